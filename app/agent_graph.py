@@ -1,11 +1,14 @@
 from __future__ import annotations
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import SystemMessage
-from typing import Annotated, TypedDict
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+from typing import Annotated, Optional, TypedDict
 from langgraph.graph import StateGraph, START
 from langgraph.graph.state import CompiledStateGraph
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode, tools_condition
+from app.core import telemetry
+from app.core.context_window import ContextPolicy
 
 system_message = SystemMessage('You are a helpful assistant that can produce human-like responses.')
 
@@ -16,26 +19,73 @@ prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
+summary_prompt = ChatPromptTemplate.from_messages(
+    [
+        SystemMessage(
+            'Summarize the conversation below for your own future reference. '
+            'Extend the existing summary if there is one. Keep names, numbers, '
+            'decisions and open questions; drop small talk.'
+        ),
+        MessagesPlaceholder(variable_name='messages'),
+    ]
+)
+
 class AgentState(TypedDict):
     messages: Annotated[list, add_messages]
+    summary: str
+    summarized_until: int
 
 
 class AgentGraph(StateGraph):
     @staticmethod
-    def create_graph(llm, tools, memory) -> CompiledStateGraph:
-        return AgentGraph(llm, tools, memory).graph
-    
-    def chatbot(self, state: AgentState):
+    def create_graph(llm, tools, memory, context: Optional[ContextPolicy] = None, summary_llm=None) -> CompiledStateGraph:
+        return AgentGraph(llm, tools, memory, context, summary_llm).graph
+
+    async def summarize(self, state: AgentState, config: RunnableConfig):
+        """Fold messages that slid out of the context window into the rolling summary."""
+        if not self.summarizes:
+            return {}
+
+        messages = state['messages']
+        summarized_until = state.get('summarized_until', 0)
+        start = self.context.window_start(messages)
+        if start - summarized_until < self.context.summary_trigger_messages:
+            return {}
+
+        dropped = self.context.window(messages[summarized_until:start], start=0)
+        if summary := state.get('summary'):
+            dropped = [HumanMessage(f'Existing summary: {summary}'), *dropped]
+        chain = summary_prompt | self.summary_llm
+        with telemetry.span('agent.summarize'):
+            result = await chain.ainvoke({'messages': dropped}, config)
+        return {'summary': result.content, 'summarized_until': start}
+
+    async def chatbot(self, state: AgentState, config: RunnableConfig):
+        messages = state['messages']
+        start = self.context.window_start(messages)
+        if self.summarizes:
+            # Messages that slid out of the window stay in it until summarize folds them in.
+            start = min(start, state.get('summarized_until', 0))
+        messages = self.context.window(messages, start=start)
+        if summary := state.get('summary'):
+            messages = [SystemMessage(f'Summary of the earlier conversation: {summary}'), *messages]
         chain = prompt | self.llm
-        message = chain.invoke({'messages': state['messages']})
-        assert len(message.tool_calls) <= 1
+        with telemetry.span('agent.llm'):
+            message = await chain.ainvoke({'messages': messages}, config)
         return {'messages': [message]}
-    
-    def __init__(self, llm, tools, memory):
+
+    @property
+    def summarizes(self) -> bool:
+        return self.context.summarize and self.summary_llm is not None
+
+    def __init__(self, llm, tools, memory, context: Optional[ContextPolicy] = None, summary_llm=None):
         super().__init__(state_schema=AgentState)
 
         self.llm = llm
+        self.summary_llm = summary_llm
+        self.context = context or ContextPolicy()
 
+        self.add_node('summarize', self.summarize)
         self.add_node('chatbot', self.chatbot)
 
         tool_node = ToolNode(tools=tools)
@@ -46,7 +96,8 @@ class AgentGraph(StateGraph):
             tools_condition,
         )
         self.add_edge('tools', 'chatbot')
-        self.add_edge(START, 'chatbot')
+        self.add_edge('summarize', 'chatbot')
+        self.add_edge(START, 'summarize')
 
         self.graph = self.compile(
             checkpointer=memory,
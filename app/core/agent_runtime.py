@@ -0,0 +1,30 @@
+from typing import Optional
+from langchain_core.runnables.config import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.graph.state import CompiledStateGraph
+from app.agent_graph import AgentGraph
+from app.core.context_window import ContextPolicy
+
+
+class AgentRuntime():
+    memory: BaseCheckpointSaver
+    graph: CompiledStateGraph
+
+    def __init__(self, llm, tools, memory: BaseCheckpointSaver, context: Optional[ContextPolicy] = None):
+        self.tools = tools
+        self.memory = memory
+        self.context = context or ContextPolicy()
+        self.graph = AgentGraph.create_graph(
+            llm.bind_tools(tools=tools),
+            tools,
+            memory,
+            context=self.context,
+            summary_llm=llm,
+        )
+
+    @staticmethod
+    def config(thread_id: str, user_id: Optional[str] = None) -> RunnableConfig:
+        configurable = {'thread_id': thread_id}
+        if user_id is not None:
+            configurable['user_id'] = user_id
+        return {'configurable': configurable}
@@ -0,0 +1,63 @@
+from typing import List
+from langchain_core.embeddings import Embeddings
+from app.core import telemetry
+from app.utils.cache import TTLCache
+
+
+def normalize_query(text: str) -> str:
+    return ' '.join(text.split()).casefold()
+
+
+class CachedEmbeddings(Embeddings):
+    """Caches query embeddings by model name and normalized query text.
+
+    Document embeddings are passed straight through; the note indexer
+    already avoids re-encoding unchanged chunks.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache: TTLCache):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache
+
+    def _key(self, text: str):
+        return (self.model_name, normalize_query(text))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        if (embedding := self.cache.get(key)) is None:
+            with telemetry.span('embedding.query'):
+                embedding = self.embeddings.embed_query(text)
+            self.cache.set(key, embedding)
+        return embedding
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        if (embedding := self.cache.get(key)) is None:
+            with telemetry.span('embedding.query'):
+                embedding = await self.embeddings.aembed_query(text)
+            self.cache.set(key, embedding)
+        return embedding
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries, encoding the cache misses in one batch.
+
+        Misses go through `aembed_documents`, which matches `embed_query`
+        for models that do not prepend a query instruction, like ours.
+        """
+        keys = [self._key(text) for text in texts]
+        embeddings = [self.cache.get(key) for key in keys]
+        misses = {key: text for key, text, embedding in zip(keys, texts, embeddings) if embedding is None}
+        if misses:
+            with telemetry.span('embedding.query', batch=True):
+                encoded = dict(zip(misses, await self.embeddings.aembed_documents(list(misses.values()))))
+            for key, embedding in encoded.items():
+                self.cache.set(key, embedding)
+            embeddings = [encoded[key] if embedding is None else embedding for key, embedding in zip(keys, embeddings)]
+        return embeddings
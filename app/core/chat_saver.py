@@ -1,12 +1,43 @@
 from langgraph.checkpoint.mongodb import AsyncMongoDBSaver
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.core import telemetry
 from app.core.settings import settings
 
 
+class InstrumentedMongoDBSaver(AsyncMongoDBSaver):
+    """Times checkpoint reads and writes into the span histogram."""
+
+    async def aget_tuple(self, config):
+        with telemetry.span('checkpoint.get'):
+            return await super().aget_tuple(config)
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        with telemetry.span('checkpoint.put'):
+            return await super().aput(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, *args, **kwargs):
+        with telemetry.span('checkpoint.put_writes'):
+            return await super().aput_writes(config, writes, task_id, *args, **kwargs)
+
+
 class ChatSaver():
+    collection_name = 'chats_cp'
+    writes_collection_name = 'checkpoint_writes_aio'
+
     @classmethod
     def create(cls) -> AsyncMongoDBSaver:
         return AsyncMongoDBSaver.from_conn_string(
             settings.database_uri,
             settings.database_name,
-            'chats_cp',
+            cls.collection_name,
+            cls.writes_collection_name,
+        )
+
+    @classmethod
+    def from_client(cls, client: AsyncIOMotorClient) -> AsyncMongoDBSaver:
+        return InstrumentedMongoDBSaver(
+            client,
+            settings.database_name,
+            cls.collection_name,
+            cls.writes_collection_name,
         )
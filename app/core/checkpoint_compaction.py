@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CompactionStats:
+    threads: int = 0
+    checkpoints: int = 0
+    writes: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    def add(self, other: 'CompactionStats'):
+        self.threads += other.threads
+        self.checkpoints += other.checkpoints
+        self.writes += other.writes
+        self.bytes += other.bytes
+        self.seconds += other.seconds
+
+    def to_dict(self) -> dict:
+        return {
+            'threads': self.threads,
+            'checkpoints': self.checkpoints,
+            'writes': self.writes,
+            'bytes': self.bytes,
+            'seconds': self.seconds,
+        }
+
+
+@dataclass
+class _Totals:
+    compacted: CompactionStats = field(default_factory=CompactionStats)
+    deleted: CompactionStats = field(default_factory=CompactionStats)
+    sweeps: int = 0
+    last_sweep_at: Optional[float] = None
+
+
+class CheckpointCompactor():
+    """Keeps the latest `keep` checkpoints per thread and namespace.
+
+    Each saved checkpoint holds the full channel values, so older ones
+    (and their pending writes) are only needed for time travel, which
+    the app does not use. Threads are marked after each chat turn and
+    compacted in the background at most `threads_per_second` at a time;
+    a sweep on start-up and every `sweep_interval` seconds catches
+    threads that were never marked, e.g. from before compaction existed.
+    A sweep walks the thread ids on the `thread_id` index
+    `sweep_batch_size` threads at a time, and only moves on to the next
+    batch once the threads it marked have been compacted.
+    """
+
+    def __init__(
+        self,
+        checkpoints: AsyncIOMotorCollection,
+        writes: AsyncIOMotorCollection,
+        keep: int = 3,
+        threads_per_second: float = 20,
+        sweep_interval: Optional[float] = 60 * 60,
+        sweep_batch_size: int = 500,
+    ):
+        if keep < 1:
+            raise ValueError('keep must be at least 1')
+        self._checkpoints = checkpoints
+        self._writes = writes
+        self.keep = keep
+        self._delay = 1 / threads_per_second if threads_per_second else 0
+        self._sweep_interval = sweep_interval
+        self._sweep_batch_size = sweep_batch_size
+        self._dirty: OrderedDict[str, None] = OrderedDict()
+        self._sweep_after: Optional[str] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._totals = _Totals()
+
+    def mark(self, thread_id: str):
+        """Queue a thread for compaction after it gained a checkpoint.
+
+        Ignored while the compactor is not running, e.g. on a worker that is
+        not the leader; the leader's sweep picks such threads up.
+        """
+        if self._task is None:
+            return
+        self._dirty[thread_id] = None
+        self._dirty.move_to_end(thread_id)
+        self._wakeup.set()
+
+    async def _measure(self, collection: AsyncIOMotorCollection, query: dict) -> int:
+        result = await collection.aggregate([
+            {'$match': query},
+            {'$group': {'_id': None, 'bytes': {'$sum': {'$bsonSize': '$$ROOT'}}}},
+        ]).to_list(1)
+        return result[0]['bytes'] if result else 0
+
+    async def _delete(self, query: dict, stats: CompactionStats):
+        stats.bytes += await self._measure(self._checkpoints, query)
+        stats.bytes += await self._measure(self._writes, query)
+        stats.checkpoints += (await self._checkpoints.delete_many(query)).deleted_count
+        stats.writes += (await self._writes.delete_many(query)).deleted_count
+
+    async def compact_thread(self, thread_id: str) -> CompactionStats:
+        start = time.perf_counter()
+        stats = CompactionStats()
+        cursor = self._checkpoints.find(
+            {'thread_id': thread_id},
+            {'_id': 0, 'checkpoint_ns': 1, 'checkpoint_id': 1},
+        ).sort([('checkpoint_ns', 1), ('checkpoint_id', -1)])
+
+        expired: Dict[str, List[str]] = {}
+        kept: Dict[str, int] = {}
+        async for doc in cursor:
+            namespace = doc.get('checkpoint_ns', '')
+            if kept.get(namespace, 0) < self.keep:
+                kept[namespace] = kept.get(namespace, 0) + 1
+            else:
+                expired.setdefault(namespace, []).append(doc['checkpoint_id'])
+
+        for namespace, checkpoint_ids in expired.items():
+            await self._delete(
+                {'thread_id': thread_id, 'checkpoint_ns': namespace, 'checkpoint_id': {'$in': checkpoint_ids}},
+                stats,
+            )
+
+        if expired:
+            stats.threads = 1
+        stats.seconds = time.perf_counter() - start
+        self._totals.compacted.add(stats)
+        return stats
+
+    async def delete_thread(self, thread_id: str) -> CompactionStats:
+        """Remove every checkpoint and write of a thread, e.g. when its chat is deleted."""
+        start = time.perf_counter()
+        stats = CompactionStats(threads=1)
+        self._dirty.pop(thread_id, None)
+        await self._delete({'thread_id': thread_id}, stats)
+        stats.seconds = time.perf_counter() - start
+        self._totals.deleted.add(stats)
+        return stats
+
+    async def sweep(self) -> bool:
+        """Mark the threads among the next `sweep_batch_size` that hold more than `keep` checkpoints.
+
+        Resumes after the last thread id of the previous call; returns True
+        once the walk has passed the last thread, and starts over on the
+        next call.
+        """
+        thread_id = self._sweep_after
+        for _ in range(self._sweep_batch_size):
+            query = {} if thread_id is None else {'thread_id': {'$gt': thread_id}}
+            docs = await self._checkpoints.find(query, {'_id': 0, 'thread_id': 1}).sort('thread_id', 1).limit(1).to_list(1)
+            if not docs:
+                thread_id = None
+                break
+            thread_id = docs[0]['thread_id']
+            checkpoints = await self._checkpoints.find(
+                {'thread_id': thread_id},
+                {'_id': 1},
+            ).limit(self.keep + 1).to_list(self.keep + 1)
+            if len(checkpoints) > self.keep:
+                self.mark(thread_id)
+
+        self._sweep_after = thread_id
+        if thread_id is not None:
+            return False
+        self._totals.sweeps += 1
+        self._totals.last_sweep_at = time.time()
+        return True
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        next_sweep = time.monotonic()
+        while True:
+            sweep_pending = self._sweep_after is not None and not self._dirty
+            if self._sweep_interval is not None and (sweep_pending or time.monotonic() >= next_sweep):
+                try:
+                    finished = await self.sweep()
+                except Exception:
+                    logger.exception('checkpoint sweep failed')
+                    self._sweep_after = None
+                    finished = True
+                if finished:
+                    next_sweep = time.monotonic() + self._sweep_interval
+
+            if not self._dirty:
+                self._wakeup.clear()
+                timeout = max(0.0, next_sweep - time.monotonic()) if self._sweep_interval is not None else None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            thread_id, _ = self._dirty.popitem(last=False)
+            try:
+                stats = await self.compact_thread(thread_id)
+            except Exception:
+                logger.exception('checkpoint compaction failed', extra={'thread_id': thread_id})
+            else:
+                if stats.checkpoints:
+                    logger.debug('compacted checkpoints', extra={'thread_id': thread_id, **stats.to_dict()})
+            await asyncio.sleep(self._delay)
+
+    def stats(self) -> dict:
+        return {
+            'keep': self.keep,
+            'pending_threads': len(self._dirty),
+            'compacted': self._totals.compacted.to_dict(),
+            'deleted': self._totals.deleted.to_dict(),
+            'sweeps': self._totals.sweeps,
+            'sweeping': self._sweep_after is not None,
+            'last_sweep_at': self._totals.last_sweep_at,
+        }
@@ -0,0 +1,230 @@
+import re
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+from app.core.note_index import content_hash
+
+TokenCounter = Callable[[str], int]
+
+_heading = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+_fence = re.compile(r'^\s*(```|~~~)')
+_list_item = re.compile(r'^\s*(?:[-*+]|\d+[.)])\s+')
+_sentence_end = re.compile(r'(?<=[.!?])\s+')
+
+
+def approximate_tokens(text: str) -> int:
+    """~4 characters per token, for when no tokenizer is loaded."""
+    return (len(text) + 3) // 4
+
+def load_token_counter(model_name: str) -> TokenCounter:
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name, trust_remote_code=True)
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+
+
+@dataclass
+class Chunk:
+    text: str
+    index: int
+    tokens: int
+    section: Tuple[str, ...]
+    # content hash, the digest NoteIndexer builds its chunk ids from
+    id: str
+
+
+@dataclass
+class _Block:
+    kind: str
+    text: str
+    section: Tuple[str, ...]
+
+
+@dataclass
+class _Piece:
+    kind: str
+    text: str
+    tokens: int
+    section: Tuple[str, ...]
+
+
+def _blocks(lines: Iterable[str], section: Sequence[Tuple[int, str]] = ()) -> Iterator[_Block]:
+    """Split markdown into headings, fenced code, lists and paragraphs."""
+    headings = list(section)
+    current: List[str] = []
+    kind = None
+    fence = None
+
+    def flush():
+        nonlocal current, kind
+        if current and ''.join(current).strip():
+            yield _Block(kind, ''.join(current).strip('\n').rstrip(), tuple(title for _, title in headings))
+        current, kind = [], None
+
+    for line in lines:
+        if fence:
+            current.append(line)
+            if line.strip().startswith(fence):
+                fence = None
+                yield from flush()
+            continue
+
+        if match := _fence.match(line):
+            yield from flush()
+            fence, kind, current = match.group(1), 'code', [line]
+        elif match := _heading.match(line):
+            yield from flush()
+            level = len(match.group(1))
+            while headings and headings[-1][0] >= level:
+                headings.pop()
+            headings.append((level, match.group(2)))
+            yield _Block('heading', line.strip(), tuple(title for _, title in headings))
+        elif not line.strip():
+            yield from flush()
+        elif _list_item.match(line) or (kind == 'list' and line[:1].isspace()):
+            if kind != 'list':
+                yield from flush()
+                kind = 'list'
+            current.append(line)
+        else:
+            if kind == 'list':
+                yield from flush()
+            kind = kind or 'paragraph'
+            current.append(line)
+    yield from flush()
+
+
+class MarkdownChunker():
+    """Splits markdown into chunks of at most `max_tokens` model tokens.
+
+    Headings, fenced code blocks and lists are kept whole when they fit
+    and split on lines, items and then sentences when they do not. A
+    heading starts a new chunk once the current one holds `min_tokens`,
+    and every chunk is prefixed with its heading path, so a chunk cut
+    from the middle of a section still says where it came from. Chunks
+    that continue a paragraph repeat up to `overlap_tokens` of the
+    previous chunk's last sentences.
+    """
+
+    def __init__(
+        self,
+        count_tokens: TokenCounter = approximate_tokens,
+        max_tokens: int = 256,
+        overlap_tokens: int = 32,
+        min_tokens: Optional[int] = None,
+    ):
+        if overlap_tokens >= max_tokens // 2:
+            raise ValueError('overlap_tokens must be less than half of max_tokens')
+        self.count_tokens = count_tokens
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.min_tokens = max_tokens // 4 if min_tokens is None else min_tokens
+
+    def split_text(self, text: str) -> List[str]:
+        return [chunk.text for chunk in self.split(text)]
+
+    def split(self, text: str, section: Sequence[Tuple[int, str]] = ()) -> List[Chunk]:
+        return list(self.iter_split(text.splitlines(keepends=True), section))
+
+    def iter_split(self, lines: Iterable[str], section: Sequence[Tuple[int, str]] = ()) -> Iterator[Chunk]:
+        """Chunk a stream of lines, e.g. an open file, holding one chunk at a time."""
+        pieces = (
+            piece
+            for block in _blocks(lines, section)
+            for piece in self._pieces(block, self.max_tokens - self._prefix_tokens(block.section) - 2)
+        )
+        return self._pack(pieces)
+
+    def _prefix(self, section: Tuple[str, ...]) -> str:
+        return ' > '.join(section)
+
+    def _prefix_tokens(self, section: Tuple[str, ...]) -> int:
+        return self.count_tokens(self._prefix(section)) + 1 if section else 0
+
+    def _pieces(self, block: _Block, budget: int) -> List[_Piece]:
+        budget = max(budget, self.max_tokens // 2)
+        if block.kind == 'code':
+            parts = self._fit(block.text.split('\n'), '\n', budget)
+        elif block.kind == 'list':
+            parts = self._fit(re.split(r'\n(?=\s*(?:[-*+]|\d+[.)])\s)', block.text), '\n', budget)
+        else:
+            parts = self._fit([block.text], ' ', budget)
+        return [_Piece(block.kind, part, self.count_tokens(part), block.section) for part in parts]
+
+    def _fit(self, units: List[str], separator: str, budget: int) -> List[str]:
+        """Greedily join units up to `budget` tokens, splitting oversized units finer."""
+        parts: List[str] = []
+        current: List[str] = []
+        used = 0
+        for unit in units:
+            tokens = self.count_tokens(unit)
+            if tokens > budget:
+                if current:
+                    parts.append(separator.join(current))
+                    current, used = [], 0
+                parts.extend(self._split_unit(unit, budget))
+                continue
+            if current and used + tokens + 1 > budget:
+                parts.append(separator.join(current))
+                current, used = [], 0
+            current.append(unit)
+            used += tokens + 1
+        if current:
+            parts.append(separator.join(current))
+        return parts
+
+    def _split_unit(self, unit: str, budget: int) -> List[str]:
+        sentences = _sentence_end.split(unit)
+        if len(sentences) > 1:
+            return self._fit(sentences, ' ', budget)
+        words = unit.split(' ')
+        if len(words) > 1:
+            return self._fit(words, ' ', budget)
+        size = max(1, len(unit) * budget // max(1, self.count_tokens(unit)))
+        return [unit[i:i + size] for i in range(0, len(unit), size)]
+
+    def _tail(self, text: str) -> str:
+        """The longest run of trailing sentences that fits in `overlap_tokens`."""
+        if not self.overlap_tokens:
+            return ''
+        tail = ''
+        for sentence in reversed(_sentence_end.split(text)):
+            candidate = f'{sentence} {tail}'.strip()
+            if self.count_tokens(candidate) > self.overlap_tokens:
+                break
+            tail = candidate
+        return tail
+
+    def _pack(self, pieces: Iterable[_Piece]) -> Iterator[Chunk]:
+        current: List[_Piece] = []
+        used = 0
+        index = 0
+
+        def emit() -> Chunk:
+            first = current[0]
+            section = first.section[:-1] if first.kind == 'heading' else first.section
+            body = '\n\n'.join(piece.text for piece in current)
+            text = f'{self._prefix(section)}\n{body}' if section else body
+            return Chunk(text, index, self.count_tokens(text), section, content_hash(text))
+
+        for piece in pieces:
+            budget = self.max_tokens - self._prefix_tokens(current[0].section if current else piece.section)
+            breaks_section = piece.kind == 'heading' and used >= self.min_tokens
+            if current and (breaks_section or used + piece.tokens + 2 > budget):
+                # a heading belongs with the content after it, not at the end of a chunk
+                carried: List[_Piece] = []
+                while len(current) > 1 and current[-1].kind == 'heading':
+                    carried.insert(0, current.pop())
+                yield emit()
+                index += 1
+                last = current[-1]
+                current, used = carried, sum(heading.tokens + 2 for heading in carried)
+                if not carried and not breaks_section and last.kind == 'paragraph' and piece.kind == 'paragraph':
+                    tail = self._tail(last.text)
+                    tail_tokens = self.count_tokens(tail) if tail else 0
+                    if tail and tail_tokens + piece.tokens + 4 <= budget:
+                        current.append(_Piece('overlap', tail, tail_tokens, last.section))
+                        used = tail_tokens + 2
+            current.append(piece)
+            used += piece.tokens + 2
+        if current:
+            yield emit()
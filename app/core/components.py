@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+from typing import Callable, Generic, List, Optional, TypeVar
+from langchain_core.embeddings import Embeddings
+
+T = TypeVar('T')
+
+
+class LazyComponent(Generic[T]):
+    """A heavyweight dependency that is built on first use, at most once.
+
+    `get` blocks the calling thread while loading, so call `aget` from the
+    event loop; it loads on a worker thread instead.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self._factory = factory
+        self._value: Optional[T] = None
+        self._loaded = False
+        self._loading = False
+        self._lock = threading.Lock()
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self) -> T:
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                self._loading = True
+                start = time.perf_counter()
+                try:
+                    self._value = self._factory()
+                except Exception as e:
+                    self.error = str(e)
+                    raise
+                finally:
+                    self._loading = False
+                self.error = None
+                self.load_seconds = time.perf_counter() - start
+                self._loaded = True
+        return self._value
+
+    async def aget(self) -> T:
+        if self._loaded:
+            return self._value
+        return await asyncio.to_thread(self.get)
+
+    def override(self, value: T):
+        with self._lock:
+            self._value = value
+            self._loaded = True
+
+    def status(self) -> dict:
+        if self._loaded:
+            state = 'loaded'
+        elif self._loading:
+            state = 'loading'
+        elif self.error:
+            state = 'failed'
+        else:
+            state = 'not_loaded'
+        return {'status': state, 'load_seconds': self.load_seconds, 'error': self.error}
+
+
+class LazyEmbeddings(Embeddings):
+    """Embeddings facade over a lazily loaded embedding model."""
+
+    def __init__(self, component: LazyComponent[Embeddings]):
+        self.component = component
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.component.get().embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await (await self.component.aget()).aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.component.get().embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await (await self.component.aget()).aembed_query(text)
+
+async def warm_up(components: List[LazyComponent]):
+    for component in components:
+        try:
+            await component.aget()
+        except Exception:
+            pass
@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage
+
+
+def estimate_tokens(message: BaseMessage) -> int:
+    """Rough token count (~4 characters per token) including tool call arguments."""
+    size = len(message.content) if isinstance(message.content, str) else len(str(message.content))
+    for tool_call in getattr(message, 'tool_calls', None) or []:
+        size += len(tool_call['name']) + len(str(tool_call['args']))
+    return size // 4 + 4
+
+@dataclass
+class ContextPolicy:
+    max_tokens: int = 6000
+    tool_message_max_chars: int = 4000
+    summarize: bool = False
+    summary_trigger_messages: int = 20
+    token_counter: Callable[[BaseMessage], int] = estimate_tokens
+
+    def window_start(self, messages: List[BaseMessage]) -> int:
+        """Index of the first message that fits the token budget, counted back from the latest one.
+
+        The latest message is always kept. The window is moved forward to a
+        human turn when possible, otherwise back to the tool call that
+        produced its first tool result, so it never opens on an orphaned
+        ToolMessage.
+        """
+        if not messages:
+            return 0
+
+        used = 0
+        start = len(messages)
+        while start > 0:
+            cost = self.token_counter(self.trim(messages[start - 1]))
+            if used + cost > self.max_tokens and start < len(messages):
+                break
+            used += cost
+            start -= 1
+
+        if start == 0:
+            return 0
+
+        for i in range(start, len(messages)):
+            if isinstance(messages[i], HumanMessage):
+                return i
+        while start > 0 and isinstance(messages[start], ToolMessage):
+            start -= 1
+        return start
+
+    def trim(self, message: BaseMessage) -> BaseMessage:
+        limit = self.tool_message_max_chars
+        if not isinstance(message, ToolMessage) or not isinstance(message.content, str) or len(message.content) <= limit:
+            return message
+        omitted = len(message.content) - limit
+        return message.model_copy(update={'content': f'{message.content[:limit]}\n[{omitted} characters truncated]'})
+
+    def window(self, messages: List[BaseMessage], start: Optional[int] = None) -> List[BaseMessage]:
+        start = self.window_start(messages) if start is None else start
+        return [self.trim(message) for message in messages[start:]]
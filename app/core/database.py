@@ -6,7 +6,10 @@ db = db_client[settings.database_name]
 
 chats_collection = db['chats']
 chats_cp_collection = db['chats_cp']
+chats_cp_writes_collection = db['checkpoint_writes_aio']
 
 notes_collection = db['notes']
 
 users_collection = db['users']
+
+locks_collection = db['locks']
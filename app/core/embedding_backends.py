@@ -0,0 +1,71 @@
+import hashlib
+from typing import List, Literal, Optional
+from langchain_core.embeddings import Embeddings
+
+EmbeddingBackend = Literal['torch', 'torch-int8', 'onnx']
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """LangChain embeddings over an already configured SentenceTransformer."""
+
+    def __init__(self, model, batch_size: int = 32):
+        self.model = model
+        self.batch_size = batch_size
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        embeddings = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return embeddings.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def load_embeddings(
+    model_name: str,
+    backend: EmbeddingBackend = 'torch',
+    dimensions: Optional[int] = None,
+    onnx_file: Optional[str] = None,
+    batch_size: int = 32,
+) -> SentenceTransformerEmbeddings:
+    """Load `model_name` for the given backend.
+
+    - torch: full precision, on CUDA when available.
+    - torch-int8: CPU, with every Linear layer dynamically quantized to int8.
+    - onnx: ONNX Runtime on CPU; `onnx_file` picks a pre-exported variant
+      such as 'onnx/model_qint8_avx512_vnni.onnx', otherwise the model is
+      exported on first load, which needs `optimum` and fails for models
+      whose remote code ONNX cannot trace.
+
+    `dimensions` truncates Matryoshka embeddings before normalization.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    kwargs = {'trust_remote_code': True, 'truncate_dim': dimensions}
+    if backend == 'torch':
+        model = SentenceTransformer(model_name, device='cuda' if torch.cuda.is_available() else 'cpu', **kwargs)
+    elif backend == 'torch-int8':
+        model = SentenceTransformer(model_name, device='cpu', **kwargs)
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif backend == 'onnx':
+        model_kwargs = {'file_name': onnx_file} if onnx_file else {}
+        model = SentenceTransformer(model_name, device='cpu', backend='onnx', model_kwargs=model_kwargs, **kwargs)
+    else:
+        raise ValueError(f'Unknown embedding backend: {backend}')
+
+    return SentenceTransformerEmbeddings(model, batch_size=batch_size)
+
+def embedding_key(model_name: str, backend: EmbeddingBackend, dimensions: Optional[int] = None) -> str:
+    """Identifies the vector space, for cache keys and collection names."""
+    return f'{model_name}:{backend}:{dimensions or "full"}'
+
+def collection_name(key: str, base: str = 'notes') -> str:
+    """Collection for one `embedding_key`, so vectors from different models,
+    backends or dimensions never share a collection."""
+    return f'{base}_{hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]}'
@@ -0,0 +1,277 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+from app.core.locks import MongoLocks
+from app.core.note_index import IndexPlan, NoteIndexer
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    queued = 'queued'
+    running = 'running'
+    done = 'done'
+    failed = 'failed'
+    superseded = 'superseded'
+
+@dataclass
+class EmbeddingJob:
+    note_id: str
+    user_id: str
+    text: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: JobStatus = JobStatus.queued
+    reused: int = 0
+    recomputed: int = 0
+    deleted: int = 0
+    error: Optional[str] = None
+    superseded_by: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    on_finish: Optional[Callable[['EmbeddingJob'], None]] = field(default=None, repr=False)
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'note_id': self.note_id,
+            'status': self.status,
+            'reused': self.reused,
+            'recomputed': self.recomputed,
+            'deleted': self.deleted,
+            'error': self.error,
+            'superseded_by': self.superseded_by,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class EmbeddingQueue():
+    """In-process queue that embeds notes off the event loop.
+
+    Pending saves of the same note are collapsed so only the latest
+    version is embedded. Each round drains up to `max_jobs` notes, chunks
+    them with `chunk_text` on a worker thread, plans them against the
+    index and encodes all of their new chunks together in `batch_size`
+    batches on the worker threads.
+
+    With `locks`, each note is locked from planning to writing, so workers
+    sharing a vectorstore never plan the same note against chunks another
+    worker is replacing. A note locked elsewhere waits for a later round.
+    """
+
+    def __init__(
+        self,
+        indexer: NoteIndexer,
+        embeddings: Embeddings,
+        chunk_text: Callable[[str], List[str]],
+        batch_size: int = 64,
+        max_jobs: int = 32,
+        workers: int = 1,
+        history: int = 1000,
+        locks: Optional[MongoLocks] = None,
+        lock_ttl: float = 300,
+        lock_retry: float = 1.0,
+    ):
+        self._indexer = indexer
+        self._embeddings = embeddings
+        self._chunk_text = chunk_text
+        self._batch_size = batch_size
+        self._max_jobs = max_jobs
+        self._workers = workers
+        self._history = history
+        self._locks = locks
+        self._lock_ttl = lock_ttl
+        self._lock_retry = lock_retry
+        self._pending: OrderedDict[str, EmbeddingJob] = OrderedDict()
+        self._jobs: OrderedDict[str, EmbeddingJob] = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._progress = asyncio.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def submit(
+        self,
+        note_id: str,
+        user_id: str,
+        text: str,
+        on_finish: Optional[Callable[[EmbeddingJob], None]] = None,
+    ) -> EmbeddingJob:
+        job = EmbeddingJob(note_id=note_id, user_id=user_id, text=text, on_finish=on_finish)
+
+        if previous := self._pending.pop(note_id, None):
+            previous.superseded_by = job.id
+            self._finish(previous, status=JobStatus.superseded)
+
+        self._pending[note_id] = job
+        self._jobs[job.id] = job
+        while len(self._jobs) > self._history:
+            self._jobs.popitem(last=False)
+
+        self._wakeup.set()
+        return job
+
+    def get(self, job_id: str) -> Optional[EmbeddingJob]:
+        return self._jobs.get(job_id)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def wait_for_capacity(self, limit: int):
+        """Wait until fewer than `limit` notes are pending, for producers that submit in bulk."""
+        while len(self._pending) >= limit:
+            if self._task is not None and self._task.done():
+                raise RuntimeError('embedding queue is not running')
+            self._progress.clear()
+            await self._progress.wait()
+
+    def start(self):
+        self._executor = ThreadPoolExecutor(self._workers, thread_name_prefix='embedding')
+        self._task = asyncio.create_task(self._run())
+        self._task.add_done_callback(self._stopped)
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _stopped(self, task: asyncio.Task):
+        if not task.cancelled() and (error := task.exception()) is not None:
+            logger.error('embedding queue stopped', exc_info=error)
+        self._progress.set()
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._pending:
+                await self._process(self._take())
+                self._progress.set()
+
+    def _take(self) -> List[EmbeddingJob]:
+        jobs = []
+        while self._pending and len(jobs) < self._max_jobs:
+            _, job = self._pending.popitem(last=False)
+            job.status = JobStatus.running
+            jobs.append(job)
+        return jobs
+
+    def _chunk(self, jobs: List[EmbeddingJob]) -> List[object]:
+        chunks = []
+        for job in jobs:
+            try:
+                chunks.append(self._chunk_text(job.text))
+            except Exception as e:
+                chunks.append(e)
+        return chunks
+
+    async def _lock(self, jobs: List[EmbeddingJob]) -> List[EmbeddingJob]:
+        """The jobs whose note lock was taken; the others go back to the queue."""
+        if self._locks is None:
+            return jobs
+        locked = []
+        for job in jobs:
+            try:
+                acquired = await self._locks.acquire(f'note:{job.note_id}', self._lock_ttl)
+            except Exception as e:
+                self._finish(job, error=e)
+                continue
+            if acquired:
+                locked.append(job)
+            elif job.note_id in self._pending:
+                job.superseded_by = self._pending[job.note_id].id
+                self._finish(job, status=JobStatus.superseded)
+            else:
+                job.status = JobStatus.queued
+                self._pending[job.note_id] = job
+        if not locked:
+            await asyncio.sleep(self._lock_retry)
+        return locked
+
+    async def _unlock(self, jobs: List[EmbeddingJob]):
+        for job in jobs:
+            try:
+                await self._locks.release(f'note:{job.note_id}')
+            except Exception:
+                logger.exception('releasing a note lock failed', extra={'note_id': job.note_id})
+
+    async def _process(self, jobs: List[EmbeddingJob]):
+        jobs = await self._lock(jobs)
+        try:
+            await self._embed(jobs)
+        finally:
+            if self._locks is not None:
+                await self._unlock(jobs)
+
+    async def _embed(self, jobs: List[EmbeddingJob]):
+        loop = asyncio.get_running_loop()
+        chunks = await loop.run_in_executor(self._executor, self._chunk, jobs)
+        plans: Dict[str, IndexPlan] = {}
+        for job, job_chunks in zip(jobs, chunks):
+            if isinstance(job_chunks, Exception):
+                self._finish(job, error=job_chunks)
+                continue
+            try:
+                plans[job.id] = await self._indexer.plan(job.note_id, job.user_id, job_chunks)
+            except Exception as e:
+                self._finish(job, error=e)
+
+        texts = [text for plan in plans.values() for text in plan.texts]
+        try:
+            embeddings = await self._encode(texts)
+        except Exception as e:
+            for job in jobs:
+                if job.id in plans:
+                    self._finish(job, error=e)
+            return
+
+        offset = 0
+        for job in jobs:
+            if (plan := plans.get(job.id)) is None:
+                continue
+            plan_embeddings = embeddings[offset:offset + plan.recomputed]
+            offset += plan.recomputed
+            try:
+                await self._indexer.apply(plan, plan_embeddings)
+            except Exception as e:
+                self._finish(job, error=e)
+                continue
+            job.reused = plan.reused
+            job.recomputed = plan.recomputed
+            job.deleted = plan.deleted
+            self._finish(job)
+
+    async def _encode(self, texts: List[str]) -> List[List[float]]:
+        """Encode `texts` in batches, running up to `workers` batches at once."""
+        loop = asyncio.get_running_loop()
+        batches = [texts[i:i + self._batch_size] for i in range(0, len(texts), self._batch_size)]
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self._executor, self._embeddings.embed_documents, batch)
+            for batch in batches
+        ))
+        return [embedding for result in results for embedding in result]
+
+    @staticmethod
+    def _finish(job: EmbeddingJob, error: Optional[Exception] = None, status: Optional[JobStatus] = None):
+        job.status = status or (JobStatus.failed if error else JobStatus.done)
+        job.error = str(error) if error else None
+        job.text = ''
+        job.finished_at = time.time()
+        if on_finish := job.on_finish:
+            job.on_finish = None
+            try:
+                on_finish(job)
+            except Exception:
+                logger.exception('embedding job callback failed', extra={'job_id': job.id})
@@ -0,0 +1,25 @@
+from app.core.database import (
+    chats_collection,
+    chats_cp_collection,
+    chats_cp_writes_collection,
+    notes_collection,
+)
+
+
+async def ensure_indexes():
+    for collection in (chats_collection, notes_collection):
+        await collection.update_many(
+            {'updated_at': {'$exists': False}},
+            [{'$set': {'updated_at': {'$toDate': '$_id'}}}],
+        )
+        await collection.create_index(
+            [('user_id', 1), ('updated_at', -1), ('_id', -1)],
+            name='user_updated_at',
+        )
+    await notes_collection.create_index(
+        [('user_id', 1), ('title', 'text'), ('content', 'text')],
+        name='user_text',
+        weights={'title': 5, 'content': 1},
+    )
+    for collection in (chats_cp_collection, chats_cp_writes_collection):
+        await collection.create_index([('thread_id', 1)], name='thread_id')
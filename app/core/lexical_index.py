@@ -0,0 +1,204 @@
+from __future__ import annotations
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+from langchain_core.documents import Document
+
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
+
+_token_pattern = re.compile(r'\w+(?:[-./:]\w+)*')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; keeps codes and dates like `INV-204` or `2024-05-01` whole."""
+    return [token.casefold() for token in _token_pattern.findall(text)]
+
+@dataclass
+class _Chunk:
+    user_id: str
+    text: str
+    metadata: dict
+    length: int
+    term_counts: Counter
+
+
+class LexicalIndex():
+    """In-process BM25 index over note chunks, partitioned per user.
+
+    Term statistics are kept per user, matching the per-user scope of the
+    notes tool. Updated from the same write path as the vectorstore.
+
+    `load` may run while notes are being written: chunks written or
+    deleted during the load are newer than what the loader read, so the
+    loader skips them, and metadata updates to chunks it has not reached
+    yet are applied when it does. `reload` rebuilds the index the same way
+    to pick up chunks written by other workers to a shared vectorstore.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ready = False
+        self.loading = False
+        self.error: Optional[str] = None
+        self._touched: Set[str] = set()
+        self._pending_metadata: Dict[str, dict] = {}
+        self._reloading = False
+        self._reload_touched: Set[str] = set()
+        self._chunks: Dict[str, _Chunk] = {}
+        self._postings: Dict[str, Dict[str, Set[str]]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def add(self, ids: List[str], texts: List[str], metadatas: List[dict]):
+        with self._lock:
+            if self.loading:
+                self._touched.update(ids)
+            if self._reloading:
+                self._reload_touched.update(ids)
+            self._add(ids, texts, metadatas)
+
+    def update_metadata(self, ids: List[str], metadatas: List[dict]):
+        with self._lock:
+            known = {i: m for i, m in zip(ids, metadatas) if i in self._chunks}
+            if self._reloading:
+                self._reload_touched.update(ids)
+            if self.loading:
+                self._pending_metadata.update((i, m) for i, m in zip(ids, metadatas) if i not in known)
+            self._add(list(known), [self._chunks[i].text for i in known], list(known.values()))
+
+    def remove(self, ids: List[str]):
+        with self._lock:
+            if self.loading:
+                self._touched.update(ids)
+            if self._reloading:
+                self._reload_touched.update(ids)
+            for chunk_id in ids:
+                self._remove(chunk_id)
+
+    def search(self, user_id: str, query: str, k: int) -> List[Tuple[Document, float]]:
+        terms = set(tokenize(query))
+        with self._lock:
+            postings = self._postings.get(user_id)
+            if not postings or not terms:
+                return []
+
+            doc_count = self._counts[user_id]
+            average_length = max(self._lengths[user_id] / doc_count, 1)
+            scores: Dict[str, float] = {}
+            for term in terms:
+                if not (matches := postings.get(term)):
+                    continue
+                idf = math.log(1 + (doc_count - len(matches) + 0.5) / (len(matches) + 0.5))
+                for chunk_id in matches:
+                    chunk = self._chunks[chunk_id]
+                    tf = chunk.term_counts[term]
+                    norm = self.k1 * (1 - self.b + self.b * chunk.length / average_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            return [
+                (Document(page_content=self._chunks[i].text, metadata=dict(self._chunks[i].metadata)), score)
+                for i, score in ranked
+            ]
+
+    def load(self, vectorstore: Chroma, page_size: int = 1000):
+        """Index every chunk in the vectorstore.
+
+        Reads the ids first and then the chunks by id, so deletes during
+        the load cannot shift later pages.
+        """
+        with self._lock:
+            self.loading = True
+            self.error = None
+        try:
+            ids = vectorstore.get(include=[])['ids']
+            for start in range(0, len(ids), page_size):
+                page = vectorstore.get(ids=ids[start:start + page_size], include=['documents', 'metadatas'])
+                with self._lock:
+                    fresh = [
+                        (chunk_id, text, self._pending_metadata.pop(chunk_id, metadata))
+                        for chunk_id, text, metadata in zip(page['ids'], page['documents'], page['metadatas'])
+                        if chunk_id not in self._touched
+                    ]
+                    if fresh:
+                        chunk_ids, texts, metadatas = map(list, zip(*fresh))
+                        self._add(chunk_ids, texts, metadatas)
+        except Exception as e:
+            self.error = repr(e)
+            raise
+        finally:
+            with self._lock:
+                self.loading = False
+                self._touched.clear()
+                self._pending_metadata.clear()
+        self.ready = True
+
+    def reload(self, vectorstore: Chroma, page_size: int = 1000):
+        """Rebuild the index from the vectorstore and swap it in.
+
+        Chunks written here while the rebuild reads keep their local version.
+        """
+        fresh = LexicalIndex(self.k1, self.b)
+        with self._lock:
+            self._reloading = True
+        try:
+            fresh.load(vectorstore, page_size)
+            with self._lock:
+                for chunk_id in self._reload_touched:
+                    fresh._remove(chunk_id)
+                    if (chunk := self._chunks.get(chunk_id)) is not None:
+                        fresh._add([chunk_id], [chunk.text], [chunk.metadata])
+                self._chunks = fresh._chunks
+                self._postings = fresh._postings
+                self._lengths = fresh._lengths
+                self._counts = fresh._counts
+        finally:
+            with self._lock:
+                self._reloading = False
+                self._reload_touched.clear()
+
+    def status(self) -> dict:
+        if self.ready:
+            state = 'loaded'
+        elif self.loading:
+            state = 'loading'
+        elif self.error:
+            state = 'failed'
+        else:
+            state = 'not_loaded'
+        return {'status': state, 'chunks': len(self), 'error': self.error}
+
+    def _add(self, ids: List[str], texts: List[str], metadatas: List[dict]):
+        for chunk_id, text, metadata in zip(ids, texts, metadatas):
+            self._remove(chunk_id)
+            if not (user_id := metadata.get('user_id')):
+                continue
+            tokens = tokenize(text)
+            chunk = _Chunk(user_id, text, metadata, len(tokens), Counter(tokens))
+            self._chunks[chunk_id] = chunk
+            postings = self._postings.setdefault(user_id, {})
+            for term in chunk.term_counts:
+                postings.setdefault(term, set()).add(chunk_id)
+            self._lengths[user_id] = self._lengths.get(user_id, 0) + chunk.length
+            self._counts[user_id] = self._counts.get(user_id, 0) + 1
+
+    def _remove(self, chunk_id: str):
+        if (chunk := self._chunks.pop(chunk_id, None)) is None:
+            return
+        postings = self._postings[chunk.user_id]
+        for term in chunk.term_counts:
+            ids = postings[term]
+            ids.discard(chunk_id)
+            if not ids:
+                del postings[term]
+        self._lengths[chunk.user_id] -= chunk.length
+        self._counts[chunk.user_id] -= 1
@@ -0,0 +1,231 @@
+import asyncio
+import copy
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Optional, Sequence
+from langchain_core.messages import AIMessage, BaseMessage, BaseMessageChunk, message_chunk_to_message
+from langchain_core.runnables import Runnable, RunnableConfig
+from app.core import telemetry
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket():
+    """Allows `rate` acquisitions per second on average, in bursts of up to `capacity`.
+
+    Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class FirstTokenTimeout(TimeoutError):
+    pass
+
+
+@dataclass
+class Provider:
+    name: str
+    model: Runnable
+    # per-provider request rate, e.g. the hosted API's limit; None for local models
+    bucket: Optional[TokenBucket] = None
+
+
+@dataclass
+class ProviderStats:
+    requests: int = 0
+    retries: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    served: int = 0
+    fallbacks: int = 0
+
+
+@dataclass
+class _Shared:
+    semaphore: asyncio.Semaphore
+    stats: Dict[str, ProviderStats] = field(default_factory=dict)
+    waiting: int = 0
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status if isinstance(status, int) else None
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, server errors, timeouts and dropped connections are worth retrying."""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    if (status := _status_code(error)) is not None:
+        return status in (408, 409, 429) or status >= 500
+    return any(marker in type(error).__name__ for marker in ('RateLimit', 'Timeout', 'Connection', 'Unavailable'))
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMGateway(Runnable):
+    """Streams a chat model through a concurrency limit, retries and fallbacks.
+
+    At most `max_concurrency` requests run per process; the rest wait in
+    line. Each provider is tried in order: a request that fails before
+    its first chunk, or yields none within `first_token_timeout`, is
+    retried with jittered exponential backoff when the error is
+    transient, then handed to the next provider. Once a chunk has been
+    streamed the request is never retried, so callers never see a
+    response restart.
+
+    `bind_tools` returns a gateway over the bound models that shares the
+    limits and stats of this one.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[Provider],
+        max_concurrency: int = 16,
+        max_retries: int = 2,
+        backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        first_token_timeout: Optional[float] = None,
+    ):
+        if not providers:
+            raise ValueError('LLMGateway needs at least one provider')
+        self.providers = list(providers)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.first_token_timeout = first_token_timeout
+        self._shared = _Shared(asyncio.Semaphore(max_concurrency))
+        for provider in self.providers:
+            self._shared.stats.setdefault(provider.name, ProviderStats())
+
+    def bind_tools(self, tools, **kwargs) -> 'LLMGateway':
+        bound = copy.copy(self)
+        bound.providers = [
+            Provider(provider.name, provider.model.bind_tools(tools, **kwargs), provider.bucket)
+            for provider in self.providers
+        ]
+        return bound
+
+    def _delay(self, attempt: int, error: BaseException) -> float:
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if (retry_after := _retry_after(error)) is not None:
+            delay = max(delay, min(retry_after, self.max_backoff))
+        return delay
+
+    async def _first_chunk(self, stream: AsyncIterator[BaseMessageChunk]) -> Optional[BaseMessageChunk]:
+        try:
+            return await asyncio.wait_for(stream.__anext__(), self.first_token_timeout)
+        except StopAsyncIteration:
+            return None
+        except asyncio.TimeoutError:
+            raise FirstTokenTimeout(f'no response within {self.first_token_timeout}s') from None
+
+    async def astream(
+        self,
+        input: Any,
+        config: Optional[RunnableConfig] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[BaseMessageChunk]:
+        shared = self._shared
+        queued_at = time.perf_counter()
+        shared.waiting += 1
+        try:
+            await shared.semaphore.acquire()
+        finally:
+            shared.waiting -= 1
+        try:
+            telemetry.observe('llm.queue', time.perf_counter() - queued_at)
+            error: Optional[BaseException] = None
+            for position, provider in enumerate(self.providers):
+                stats = shared.stats[provider.name]
+                for attempt in range(self.max_retries + 1):
+                    if attempt:
+                        stats.retries += 1
+                        await asyncio.sleep(self._delay(attempt - 1, error))
+                    if provider.bucket:
+                        await provider.bucket.acquire()
+                    stats.requests += 1
+                    started = time.perf_counter()
+                    stream = provider.model.astream(input, config, **kwargs)
+                    try:
+                        first = await self._first_chunk(stream)
+                    except Exception as e:
+                        await stream.aclose()
+                        error = e
+                        stats.errors += 1
+                        stats.timeouts += isinstance(e, FirstTokenTimeout)
+                        telemetry.observe('llm.error', time.perf_counter() - started, provider=provider.name, error=type(e).__name__)
+                        logger.warning(
+                            'llm request failed',
+                            extra={'provider': provider.name, 'attempt': attempt, 'error': repr(e)},
+                        )
+                        if not is_retryable(e):
+                            break
+                        continue
+
+                    telemetry.observe('llm.first_token', time.perf_counter() - started, provider=provider.name)
+                    stats.served += 1
+                    if position:
+                        stats.fallbacks += 1
+                    if first is None:
+                        return
+                    yield first
+                    try:
+                        async for chunk in stream:
+                            yield chunk
+                    except Exception:
+                        stats.errors += 1
+                        raise
+                    telemetry.observe('llm.stream', time.perf_counter() - started, provider=provider.name)
+                    return
+            raise error
+        finally:
+            shared.semaphore.release()
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> BaseMessage:
+        message = None
+        async for chunk in self.astream(input, config, **kwargs):
+            message = chunk if message is None else message + chunk
+        return message_chunk_to_message(message) if message is not None else AIMessage('')
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> BaseMessage:
+        """Blocking call without the limits; tries each provider once, in order."""
+        error: Optional[BaseException] = None
+        for provider in self.providers:
+            try:
+                return provider.model.invoke(input, config, **kwargs)
+            except Exception as e:
+                error = e
+                logger.warning('llm request failed', extra={'provider': provider.name, 'error': repr(e)})
+        raise error
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            'waiting': self._shared.waiting,
+            'providers': {name: vars(stats).copy() for name, stats in self._shared.stats.items()},
+        }
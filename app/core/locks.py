@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+
+class MongoLocks():
+    """Named locks shared by every worker through one Mongo collection.
+
+    A lock is a `{_id: name, owner, expires_at}` document. `acquire`
+    inserts it, renews it for its owner, or takes it over once it has
+    expired, so the locks of a crashed worker lapse after `ttl` seconds.
+    """
+
+    def __init__(self, collection: AsyncIOMotorCollection, ttl: float = 60):
+        self._collection = collection
+        self.ttl = ttl
+        self.owner = uuid.uuid4().hex
+
+    async def acquire(self, name: str, ttl: Optional[float] = None) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await self._collection.update_one(
+                {'_id': name, '$or': [{'owner': self.owner}, {'expires_at': {'$lte': now}}]},
+                {'$set': {'owner': self.owner, 'expires_at': now + timedelta(seconds=ttl or self.ttl)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def release(self, name: str):
+        await self._collection.delete_one({'_id': name, 'owner': self.owner})
+
+
+class Leadership():
+    """Runs work on one worker at a time by holding a lock named `name`.
+
+    Every worker tries to take or renew the lock every `ttl / 3` seconds.
+    The holder runs `on_elected` once it gets the lock and `on_deposed`
+    when it loses it or stops.
+    """
+
+    def __init__(
+        self,
+        locks: MongoLocks,
+        name: str,
+        on_elected: Callable[[], Awaitable[None]],
+        on_deposed: Callable[[], Awaitable[None]],
+    ):
+        self._locks = locks
+        self._name = name
+        self._on_elected = on_elected
+        self._on_deposed = on_deposed
+        self.leading = False
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self.leading:
+            self.leading = False
+            await self._on_deposed()
+            await self._locks.release(self._name)
+
+    async def _run(self):
+        while True:
+            try:
+                held = await self._locks.acquire(self._name)
+            except Exception:
+                logger.exception('leader lock renewal failed', extra={'lock': self._name})
+                held = False
+
+            if held and not self.leading:
+                self.leading = True
+                logger.info('elected leader', extra={'lock': self._name})
+                await self._on_elected()
+            elif not held and self.leading:
+                self.leading = False
+                logger.warning('lost leadership', extra={'lock': self._name})
+                await self._on_deposed()
+            await asyncio.sleep(self._locks.ttl / 3)
@@ -0,0 +1,148 @@
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, List, Optional
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pydantic import ValidationError
+from app.core.embedding_queue import EmbeddingJob, EmbeddingQueue, JobStatus
+from app.models.note import NoteModel
+
+
+@dataclass
+class ImportJob:
+    user_id: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = 'receiving'
+    received: int = 0
+    inserted: int = 0
+    invalid: int = 0
+    embedded: int = 0
+    embed_failed: int = 0
+    errors: List[str] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'status': self.status,
+            'received': self.received,
+            'inserted': self.inserted,
+            'invalid': self.invalid,
+            'embedded': self.embedded,
+            'embed_failed': self.embed_failed,
+            'errors': self.errors,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class NoteImporter():
+    """Imports NDJSON notes in batches and hands them to the embedding queue.
+
+    Only one batch of notes is held at a time; reading the upload pauses
+    while the embedding queue is over `max_pending_embeddings` notes.
+    """
+
+    max_errors = 20
+
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        embedding_queue: EmbeddingQueue,
+        note_text: Callable[[NoteModel], str],
+        batch_size: int = 500,
+        max_pending_embeddings: int = 2000,
+        history: int = 100,
+        on_embedded: Optional[Callable[[EmbeddingJob], None]] = None,
+    ):
+        self._collection = collection
+        self._embedding_queue = embedding_queue
+        self._note_text = note_text
+        self._batch_size = batch_size
+        self._max_pending_embeddings = max_pending_embeddings
+        self._history = history
+        self._on_embedded_note = on_embedded
+        self._jobs: OrderedDict[str, ImportJob] = OrderedDict()
+
+    def create(self, user_id: str) -> ImportJob:
+        job = ImportJob(user_id=user_id)
+        self._jobs[job.id] = job
+        while len(self._jobs) > self._history:
+            self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        return self._jobs.get(job_id)
+
+    def list(self, user_id: str) -> List[ImportJob]:
+        return [job for job in self._jobs.values() if job.user_id == user_id]
+
+    async def run(self, job: ImportJob, lines: AsyncIterator[Optional[bytes]]) -> ImportJob:
+        """Import NDJSON `lines`; a None line stands for one that was too long to read."""
+        batch: List[NoteModel] = []
+        try:
+            async for line in lines:
+                if line is None:
+                    job.received += 1
+                    self._reject(job, f'line {job.received}: line is too long')
+                    continue
+                if not line.strip():
+                    continue
+                job.received += 1
+                try:
+                    batch.append(NoteModel.model_validate_json(line))
+                except ValidationError as e:
+                    self._reject(job, f'line {job.received}: {e.errors()[0]["msg"]}')
+                    continue
+
+                if len(batch) >= self._batch_size:
+                    await self._flush(job, batch)
+                    batch = []
+
+            if batch:
+                await self._flush(job, batch)
+        except Exception as e:
+            job.status = 'failed'
+            job.errors.append(str(e))
+            raise
+        finally:
+            job.finished_at = time.time()
+
+        job.status = 'embedding' if job.embedded + job.embed_failed < job.inserted else 'done'
+        return job
+
+    async def _flush(self, job: ImportJob, notes: List[NoteModel]):
+        await self._embedding_queue.wait_for_capacity(self._max_pending_embeddings)
+
+        documents = []
+        now = datetime.now(timezone.utc)
+        for note in notes:
+            document = note.model_dump(by_alias=True, exclude=['id'])
+            document['user_id'] = job.user_id
+            document['updated_at'] = now
+            documents.append(document)
+
+        result = await self._collection.insert_many(documents, ordered=False)
+        job.inserted += len(result.inserted_ids)
+
+        on_finish = lambda embedding_job: self._on_embedded(job, embedding_job)
+        for note, note_id in zip(notes, result.inserted_ids):
+            self._embedding_queue.submit(str(note_id), job.user_id, self._note_text(note), on_finish)
+
+    def _on_embedded(self, job: ImportJob, embedding_job: EmbeddingJob):
+        if self._on_embedded_note:
+            self._on_embedded_note(embedding_job)
+        if embedding_job.status == JobStatus.done:
+            job.embedded += 1
+        else:
+            job.embed_failed += 1
+        if job.status == 'embedding' and job.embedded + job.embed_failed >= job.inserted:
+            job.status = 'done'
+
+    def _reject(self, job: ImportJob, error: str):
+        job.invalid += 1
+        if len(job.errors) < self.max_errors:
+            job.errors.append(error)
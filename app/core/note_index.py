@@ -0,0 +1,131 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional
+from app.core.components import LazyComponent
+from app.core.lexical_index import LexicalIndex
+from app.core.search_cache import SearchCache
+
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+@dataclass
+class IndexPlan:
+    note_id: str
+    user_id: str
+    ids: List[str] = field(default_factory=list)
+    texts: List[str] = field(default_factory=list)
+    metadatas: List[dict] = field(default_factory=list)
+    moved_ids: List[str] = field(default_factory=list)
+    moved_metadatas: List[dict] = field(default_factory=list)
+    deleted_ids: List[str] = field(default_factory=list)
+    reused: int = 0
+
+    @property
+    def recomputed(self) -> int:
+        return len(self.texts)
+
+    @property
+    def deleted(self) -> int:
+        return len(self.deleted_ids)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.ids or self.moved_ids or self.deleted_ids)
+
+
+class NoteIndexer():
+    """Keeps a note's chunks in the vectorstore in sync with its content.
+
+    Chunk ids are derived from the note id, the chunk's content hash and
+    its occurrence count, so unchanged chunks keep their id (and their
+    embedding) across edits. Only new chunks are embedded and only chunks
+    that disappeared are deleted.
+    """
+
+    def __init__(
+        self,
+        vectorstore: LazyComponent[Chroma],
+        search_cache: Optional[SearchCache] = None,
+        lexical_index: Optional[LexicalIndex] = None,
+    ):
+        self._vectorstore = vectorstore
+        self._search_cache = search_cache
+        self._lexical_index = lexical_index
+        self._versions: Dict[str, int] = {}
+
+    def version(self, user_id: str) -> int:
+        """Counter bumped whenever any of the user's chunks change."""
+        return self._versions.get(user_id, 0)
+
+    async def plan(self, note_id: str, user_id: str, chunks: List[str]) -> IndexPlan:
+        vectorstore = await self._vectorstore.aget()
+        existing = await asyncio.to_thread(
+            vectorstore.get,
+            where={'note_id': note_id},
+            include=['metadatas'],
+        )
+        existing_metadatas = dict(zip(existing['ids'], existing['metadatas']))
+
+        plan = IndexPlan(note_id=note_id, user_id=user_id)
+        occurrences = {}
+        kept = set()
+        for i, chunk in enumerate(chunks):
+            digest = content_hash(chunk)
+            n = occurrences[digest] = occurrences.get(digest, -1) + 1
+            chunk_id = f'{note_id}:{digest[:32]}:{n}'
+            metadata = {'note_id': note_id, 'user_id': user_id, 'index': i, 'content_hash': digest}
+            kept.add(chunk_id)
+
+            if chunk_id not in existing_metadatas:
+                plan.ids.append(chunk_id)
+                plan.texts.append(chunk)
+                plan.metadatas.append(metadata)
+                continue
+
+            plan.reused += 1
+            if existing_metadatas[chunk_id] != metadata:
+                plan.moved_ids.append(chunk_id)
+                plan.moved_metadatas.append(metadata)
+
+        plan.deleted_ids = [i for i in existing_metadatas if i not in kept]
+        return plan
+
+    async def apply(self, plan: IndexPlan, embeddings: Optional[List[List[float]]] = None):
+        if plan.texts and embeddings is None:
+            vectorstore = await self._vectorstore.aget()
+            embeddings = await vectorstore.embeddings.aembed_documents(plan.texts)
+        await asyncio.to_thread(self._write, plan, embeddings)
+        if plan.changed:
+            self._versions[plan.user_id] = self.version(plan.user_id) + 1
+        if self._search_cache:
+            self._search_cache.invalidate_note(plan.note_id, plan.user_id)
+
+    async def index(self, note_id: str, user_id: str, chunks: List[str]) -> IndexPlan:
+        plan = await self.plan(note_id, user_id, chunks)
+        await self.apply(plan)
+        return plan
+
+    def _write(self, plan: IndexPlan, embeddings: Optional[List[List[float]]]):
+        collection = self._vectorstore.get()._collection
+        if plan.deleted_ids:
+            collection.delete(ids=plan.deleted_ids)
+        if plan.moved_ids:
+            collection.update(ids=plan.moved_ids, metadatas=plan.moved_metadatas)
+        if plan.ids:
+            collection.upsert(
+                ids=plan.ids,
+                embeddings=embeddings,
+                metadatas=plan.metadatas,
+                documents=plan.texts,
+            )
+
+        if self._lexical_index:
+            self._lexical_index.remove(plan.deleted_ids)
+            self._lexical_index.update_metadata(plan.moved_ids, plan.moved_metadatas)
+            self._lexical_index.add(plan.ids, plan.texts, plan.metadatas)
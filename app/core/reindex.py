@@ -0,0 +1,128 @@
+from __future__ import annotations
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Callable, Optional, Set
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from app.core.embedding_queue import EmbeddingJob, EmbeddingQueue, JobStatus
+from app.models.note import NoteModel
+
+if TYPE_CHECKING:
+    from chromadb.api import ClientAPI
+
+logger = logging.getLogger(__name__)
+
+legacy_key = 'legacy'
+
+
+class EmbeddingBackfill():
+    """Re-embeds notes whose chunks were embedded under another embedding key.
+
+    Every finished embedding job stamps its note with the `embedding_key`
+    it was embedded with (see `stamp`), and with the text it embedded when
+    that was not the note's stored content. Changing the model, backend or
+    dimensions changes the key and the collection, so at start-up every
+    note stamped with another key is queued again, from the text it was
+    last embedded with. Notes that were never embedded are left alone.
+    Reading pauses while the queue holds `max_pending` notes, and a note is
+    only re-stamped once its job is done, so an interrupted backfill
+    resumes on the next start.
+    """
+
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        embedding_queue: EmbeddingQueue,
+        note_text: Callable[[NoteModel], str],
+        key: str,
+        max_pending: int = 2000,
+    ):
+        self._collection = collection
+        self._embedding_queue = embedding_queue
+        self._note_text = note_text
+        self._key = key
+        self._max_pending = max_pending
+        self._marks: Set[asyncio.Task] = set()
+        self.adopted = 0
+        self.queued = 0
+        self.marked = 0
+
+    async def adopt_legacy(self, client: ClientAPI, name: str = 'notes', page_size: int = 1000) -> int:
+        """Queue the notes of the collection used before collections were keyed, then drop it.
+
+        Its notes are stamped with `legacy_key`, so `run` re-embeds them
+        into the current collection from their stored content.
+        """
+        names = [getattr(c, 'name', c) for c in await asyncio.to_thread(client.list_collections)]
+        if name not in names:
+            return 0
+        legacy = await asyncio.to_thread(client.get_collection, name)
+        note_ids = set()
+        offset = 0
+        while True:
+            page = await asyncio.to_thread(legacy.get, include=['metadatas'], limit=page_size, offset=offset)
+            if not page['ids']:
+                break
+            note_ids.update(m['note_id'] for m in page['metadatas'] if m and ObjectId.is_valid(m.get('note_id')))
+            offset += len(page['ids'])
+
+        ids = [ObjectId(note_id) for note_id in note_ids]
+        for start in range(0, len(ids), page_size):
+            result = await self._collection.update_many(
+                {'_id': {'$in': ids[start:start + page_size]}, 'embedding_key': {'$exists': False}},
+                {'$set': {'embedding_key': legacy_key}},
+            )
+            self.adopted += result.modified_count
+        await asyncio.to_thread(client.delete_collection, name)
+        logger.info('adopted legacy embedding collection', extra={'collection': name, 'notes': self.adopted})
+        return self.adopted
+
+    async def run(self) -> int:
+        cursor = self._collection.find(
+            {'embedding_key': {'$exists': True, '$ne': self._key}},
+            {'user_id': 1, 'title': 1, 'content': 1, 'embedded_text': 1},
+        ).sort('_id', 1)
+        async for document in cursor:
+            if not document.get('user_id'):
+                continue
+            await self._embedding_queue.wait_for_capacity(self._max_pending)
+            embedded_text = document.get('embedded_text')
+            text = embedded_text or self._note_text(NoteModel.model_validate(document))
+            self._embedding_queue.submit(str(document['_id']), document['user_id'], text, self.stamp(embedded_text))
+            self.queued += 1
+        if self.queued:
+            logger.info('embedding backfill queued', extra={'notes': self.queued, 'embedding_key': self._key})
+        return self.queued
+
+    def stamp(self, embedded_text: Optional[str] = None) -> Callable[[EmbeddingJob], None]:
+        """on_finish callback that records the current key on the note of a finished job.
+
+        Pass `embedded_text` when the job embeds text other than the note's
+        stored content, so a later backfill re-embeds the same text.
+        """
+        return lambda job: self._mark(job, embedded_text)
+
+    def _mark(self, job: EmbeddingJob, embedded_text: Optional[str]):
+        if job.status != JobStatus.done:
+            return
+        if embedded_text is None:
+            update = {'$set': {'embedding_key': self._key}, '$unset': {'embedded_text': ''}}
+        else:
+            update = {'$set': {'embedding_key': self._key, 'embedded_text': embedded_text}}
+        task = asyncio.get_running_loop().create_task(
+            self._collection.update_one({'_id': ObjectId(job.note_id)}, update)
+        )
+        self._marks.add(task)
+        task.add_done_callback(self._marked)
+
+    def _marked(self, task: asyncio.Task):
+        self._marks.discard(task)
+        if task.cancelled():
+            return
+        if (error := task.exception()) is not None:
+            logger.error('stamping an embedded note failed', exc_info=error)
+        else:
+            self.marked += 1
+
+    def stats(self) -> dict:
+        return {'adopted': self.adopted, 'queued': self.queued, 'marked': self.marked, 'embedding_key': self._key}
@@ -0,0 +1,111 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import BaseMessage
+from app.core.cached_embeddings import normalize_query
+
+
+def context_key(messages: List[BaseMessage], summary: str = '') -> str:
+    """Hash of the conversation a prompt is answered in: the windowed messages and the rolling summary."""
+    digest = hashlib.sha256(summary.encode('utf-8'))
+    for message in messages:
+        for part in (message.type, str(message.content), str(getattr(message, 'tool_calls', None) or '')):
+            digest.update(b'\0' + part.encode('utf-8'))
+    return digest.hexdigest()
+
+@dataclass
+class _Entry:
+    embedding: np.ndarray
+    response: str
+    version: int
+    context: str
+    elapsed: float
+    created_at: float
+
+
+class SemanticResponseCache():
+    """Per-user cache of agent responses keyed by prompt similarity.
+
+    A prompt hits when its normalized embedding has cosine similarity of
+    at least `threshold` with a cached prompt of the same user, the entry
+    is younger than `ttl`, was stored at the user's current note-index
+    version, so re-embedding any note invalidates the user's entries, and
+    was answered in the same conversation context (see `context_key`), so
+    a follow-up like "tell me more" never replays another chat's answer.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        threshold: float = 0.95,
+        ttl: float = 60 * 60,
+        max_entries_per_user: int = 100,
+        max_users: int = 10000,
+    ):
+        self._embeddings = embeddings
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries_per_user = max_entries_per_user
+        self.max_users = max_users
+        self._entries: OrderedDict[str, List[_Entry]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+
+    async def _embed(self, prompt: str) -> np.ndarray:
+        embedding = np.asarray(await self._embeddings.aembed_query(normalize_query(prompt)), dtype=np.float32)
+        return embedding / (np.linalg.norm(embedding) or 1.0)
+
+    def _live_entries(self, user_id: str, version: int) -> List[_Entry]:
+        now = time.time()
+        entries = [
+            entry for entry in self._entries.get(user_id, [])
+            if entry.version == version and now - entry.created_at < self.ttl
+        ]
+        if entries:
+            self._entries[user_id] = entries
+            self._entries.move_to_end(user_id)
+        else:
+            self._entries.pop(user_id, None)
+        return entries
+
+    async def lookup(self, user_id: str, prompt: str, version: int, context: str) -> Optional[str]:
+        entries = [entry for entry in self._live_entries(user_id, version) if entry.context == context]
+        if not entries:
+            self.misses += 1
+            return None
+
+        embedding = await self._embed(prompt)
+        similarities = np.stack([entry.embedding for entry in entries]) @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.latency_saved += entries[best].elapsed
+        return entries[best].response
+
+    async def store(self, user_id: str, prompt: str, response: str, version: int, context: str, elapsed: float):
+        entry = _Entry(await self._embed(prompt), response, version, context, elapsed, time.time())
+        entries = self._live_entries(user_id, version)
+        entries.append(entry)
+        self._entries[user_id] = entries[-self.max_entries_per_user:]
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            'users': len(self._entries),
+            'entries': sum(len(entries) for entries in self._entries.values()),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'latency_saved_seconds': self.latency_saved,
+        }
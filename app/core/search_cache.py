@@ -0,0 +1,31 @@
+from typing import List, Optional
+from langchain_core.documents import Document
+from app.core.cached_embeddings import normalize_query
+from app.utils.cache import TTLCache
+
+
+class SearchCache():
+    """Caches note search results per scope.
+
+    Entries are tagged with their scope and with every note they contain.
+    Rewriting a note's embeddings drops the entries that returned it and
+    the entries of its scope, since its new chunks may now rank for them.
+    """
+
+    def __init__(self, cache: TTLCache):
+        self.cache = cache
+
+    @staticmethod
+    def _key(scope: str, query: str, k: int):
+        return (scope, normalize_query(query), k)
+
+    def get(self, scope: str, query: str, k: int) -> Optional[List[Document]]:
+        return self.cache.get(self._key(scope, query, k))
+
+    def set(self, scope: str, query: str, k: int, documents: List[Document]):
+        tags = {f'scope:{scope}'}
+        tags.update(f'note:{doc.metadata["note_id"]}' for doc in documents if 'note_id' in doc.metadata)
+        self.cache.set(self._key(scope, query, k), documents, tags=tags)
+
+    def invalidate_note(self, note_id: str, scope: str) -> int:
+        return self.cache.invalidate_tags(f'note:{note_id}', f'scope:{scope}')
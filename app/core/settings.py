@@ -1,3 +1,4 @@
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings
 
 
@@ -6,11 +7,93 @@ class Settings(BaseSettings):
     database_name: str
     database_uri: str
     llm_api_key: str
+    llm_model: str = 'llama-3.1-8b-instant'
+    llm_max_concurrency: int = 16
+    llm_requests_per_minute: Optional[float] = None
+    llm_burst: Optional[int] = None
+    llm_max_retries: int = 2
+    llm_retry_backoff: float = 0.5
+    llm_retry_max_backoff: float = 8
+    llm_first_token_timeout: Optional[float] = 20
+    llm_fallback_model: Optional[str] = None
+    llm_tokenizer: Optional[str] = None
+    ollama_base_url: str = 'http://localhost:11434'
 
     jwt_secret: str
     jwt_algorithm: str = 'HS256'
     access_token_expire_minutes: int = 60 * 24 * 10
 
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_queue_size: int = 32
+
+    user_cache_size: int = 10000
+    user_cache_ttl: float = 60
+    token_cache_size: int = 10000
+
+    warm_up: bool = True
+
+    embedding_model: str = 'nomic-ai/nomic-embed-text-v2-moe'
+    embedding_backend: Literal['torch', 'torch-int8', 'onnx'] = 'torch'
+    embedding_dimensions: Optional[int] = None
+    embedding_onnx_file: Optional[str] = None
+    embedding_backfill: bool = True
+
+    chunk_max_tokens: int = 256
+    chunk_overlap_tokens: int = 32
+    chunk_tokenizer: Optional[str] = None
+
+    chroma_host: Optional[str] = None
+    chroma_port: int = 8000
+    chroma_ssl: bool = False
+    chroma_persist_directory: str = './chroma_db'
+    lexical_reload_interval: float = 60 * 5
+    note_lock_ttl: float = 60 * 5
+    leader_lock_ttl: float = 60
+
+    embedding_batch_size: int = 64
+    embedding_max_jobs: int = 256
+    embedding_workers: int = 1
+
+    import_batch_size: int = 500
+    import_max_pending_embeddings: int = 2000
+    import_max_line_bytes: int = 1024 * 1024
+
+    query_cache_size: int = 1024
+    query_cache_ttl: float = 60 * 60
+    search_cache_size: int = 1024
+    search_cache_ttl: float = 60 * 5
+
+    search_fetch_k: int = 20
+    lexical_fast_path_max_terms: int = 3
+    search_max_queries: int = 5
+    search_max_tokens: int = 1000
+    search_min_relevance: float = 0.2
+    search_mmr_lambda: float = 0.7
+
+    response_cache_enabled: bool = False
+    response_cache_threshold: float = 0.95
+    response_cache_ttl: float = 60 * 60
+    response_cache_max_entries_per_user: int = 100
+
+    stream_flush_interval: float = 0.05
+    stream_flush_chars: int = 512
+    stream_max_pending_events: int = 256
+
+    context_max_tokens: int = 6000
+    context_tool_message_max_chars: int = 4000
+    context_summarize: bool = False
+    context_summary_trigger_messages: int = 20
+
+    checkpoint_compaction_enabled: bool = True
+    checkpoint_keep: int = 3
+    checkpoint_compaction_threads_per_second: float = 20
+    checkpoint_sweep_interval: float = 60 * 60
+
+    telemetry_enabled: bool = True
+    log_level: str = 'INFO'
+    log_json: bool = True
+
     class Config:
         env_file = '.env'
         case_sensitive = False
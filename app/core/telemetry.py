@@ -0,0 +1,145 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+default_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: dict) -> LabelValues:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _format_labels(labels: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in pairs) + '}'
+
+
+class Histogram():
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = default_buckets):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self._series: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0, 0.0]
+            bucket = bisect.bisect_left(self.buckets, value)
+            if bucket < len(self.buckets):
+                series[0][bucket] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} histogram'
+        with self._lock:
+            series = {key: (list(counts), count, total) for key, (counts, count, total) in self._series.items()}
+        for labels, (counts, count, total) in series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket{_format_labels(labels, ("le", str(bound)))} {cumulative}'
+            yield f'{self.name}_bucket{_format_labels(labels, ("le", "+Inf"))} {count}'
+            yield f'{self.name}_sum{_format_labels(labels)} {total}'
+            yield f'{self.name}_count{_format_labels(labels)} {count}'
+
+
+class Counter():
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._series: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} counter'
+        with self._lock:
+            series = dict(self._series)
+        for labels, value in series.items():
+            yield f'{self.name}{_format_labels(labels)} {value}'
+
+
+class Gauges():
+    """Gauges read from a callback at scrape time, e.g. cache sizes."""
+
+    def __init__(self, name: str, help: str, collect: Callable[[], List[Tuple[dict, float]]]):
+        self.name = name
+        self.help = help
+        self._collect = collect
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} gauge'
+        for labels, value in self._collect():
+            yield f'{self.name}{_format_labels(_labels(labels))} {value}'
+
+
+class Registry():
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return '\n'.join(line for metric in self._metrics.values() for line in metric.render()) + '\n'
+
+
+class _NoopSpan():
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_noop_span = _NoopSpan()
+
+registry = Registry()
+
+span_seconds = registry.register(Histogram('notegenie_span_seconds', 'Duration of instrumented operations.'))
+span_errors = registry.register(Counter('notegenie_span_errors_total', 'Instrumented operations that raised.'))
+request_seconds = registry.register(Histogram('notegenie_http_request_seconds', 'HTTP request time until the response body is sent.'))
+
+enabled = True
+
+def configure(is_enabled: bool):
+    global enabled
+    enabled = is_enabled
+
+@contextmanager
+def _span(name: str, labels: dict):
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        span_errors.inc(span=name, **labels)
+        raise
+    finally:
+        span_seconds.observe(time.perf_counter() - start, span=name, **labels)
+
+def span(name: str, **labels):
+    """Time a block into notegenie_span_seconds{span=name}. A shared no-op when telemetry is disabled."""
+    if not enabled:
+        return _noop_span
+    return _span(name, labels)
+
+def observe(name: str, seconds: float, **labels):
+    if enabled:
+        span_seconds.observe(seconds, span=name, **labels)
@@ -0,0 +1,47 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
+from langchain_core.embeddings import Embeddings
+
+if TYPE_CHECKING:
+    from chromadb.api import ClientAPI
+    from langchain_chroma import Chroma
+
+
+def create_chroma_client(
+    host: Optional[str] = None,
+    port: int = 8000,
+    ssl: bool = False,
+    persist_directory: str = './chroma_db',
+) -> ClientAPI:
+    """Client for a Chroma server when `host` is set, otherwise an embedded store.
+
+    The embedded store keeps its SQLite and HNSW files in one process and
+    must not be shared by several uvicorn workers. With several workers,
+    run one server that owns the directory, e.g.
+
+        chroma run --path ./chroma_db --port 8000
+
+    and point every worker at it; the index is then held in memory once.
+    """
+    import chromadb
+    from chromadb.config import Settings as ChromaSettings
+
+    client_settings = ChromaSettings(anonymized_telemetry=False)
+    if host:
+        return chromadb.HttpClient(host=host, port=port, ssl=ssl, settings=client_settings)
+    return chromadb.PersistentClient(path=persist_directory, settings=client_settings)
+
+def create_vectorstore(client: ClientAPI, collection_name: str, embeddings: Embeddings) -> Chroma:
+    """Chroma collection that ranks chunks by cosine distance.
+
+    The distance space is fixed when a collection is created, so an
+    existing collection keeps the space it was created with.
+    """
+    from langchain_chroma import Chroma
+
+    return Chroma(
+        collection_name=collection_name,
+        embedding_function=embeddings,
+        client=client,
+        collection_metadata={'hnsw:space': 'cosine'},
+    )
@@ -0,0 +1,9 @@
+from fastapi import Request
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from app.core.agent_runtime import AgentRuntime
+
+async def get_agent(request: Request) -> AgentRuntime:
+    return await request.app.state.agent.aget()
+
+def get_memory(request: Request) -> BaseCheckpointSaver:
+    return request.app.state.memory
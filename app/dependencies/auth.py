@@ -1,10 +1,25 @@
+import time
 from bson import ObjectId
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from app.core import telemetry
+from app.utils.cache import TTLCache
 from app.utils.jwt import decode_token
 from app.core.database import users_collection
+from app.core.settings import settings
+
+user_cache = TTLCache(settings.user_cache_size, settings.user_cache_ttl)
+token_cache = TTLCache(settings.token_cache_size)
+
+def invalidate_user(user_id: str):
+    """Call after changing or deleting a user so the next request reloads it."""
+    user_cache.invalidate(str(user_id))
+    token_cache.invalidate_tags(str(user_id))
 
 def verify_token(token: str):
+    if (user_id := token_cache.get(token)) is not None:
+        return user_id
+
     payload = decode_token(token)
     if payload is None:
         raise HTTPException(
@@ -17,6 +32,9 @@ def verify_token(token: str):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Invalid authentication credentials',
         )
+
+    if (expires_at := payload.get('exp')) is not None:
+        token_cache.set(token, user_id, ttl=expires_at - time.time(), tags=[user_id])
     return user_id
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='sign-in')
@@ -24,13 +42,18 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl='sign-in')
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     user_id = verify_token(token)
 
+    if (user := user_cache.get(user_id)) is not None:
+        return dict(user)
+
     try:
-        user_id = ObjectId(user_id)
+        obj_id = ObjectId(user_id)
     except Exception as e:
         raise HTTPException(status_code=400, detail='Invalid user ID') from e
 
-    user = await users_collection.find_one({'_id': user_id})
+    with telemetry.span('auth.load_user'):
+        user = await users_collection.find_one({'_id': obj_id})
     if not user:
         raise HTTPException(status_code=404, detail='User not found')
 
-    return user
+    user_cache.set(user_id, user)
+    return dict(user)
@@ -1,11 +1,20 @@
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from typing import Iterator, Optional
+from app.core.chunking import MarkdownChunker
 
 class DocumentLoader:
     buffer: str = ''
-    
+
+    def __init__(self, chunker: Optional[MarkdownChunker] = None):
+        self.chunker = chunker or MarkdownChunker()
+
     def load(self, path: str):
         with open(path, 'r', encoding='utf-8') as f:
-            text_splitter = RecursiveCharacterTextSplitter(chunk_size=1024, chunk_overlap=0, keep_separator='end')
             self.buffer = content = f.read()
-            chunks = text_splitter.split_text(content)
+            chunks = self.chunker.split_text(content)
         return chunks
+
+    def iter_chunks(self, path: str) -> Iterator[str]:
+        """Chunk a file line by line, holding at most one chunk in memory."""
+        with open(path, 'r', encoding='utf-8') as f:
+            for chunk in self.chunker.iter_split(f):
+                yield chunk.text
@@ -1,168 +1,644 @@
-from typing import List
+import asyncio
+import json
+import logging
+import re
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Literal, Optional
 from bson import ObjectId
-from fastapi import Depends, FastAPI, HTTPException
-from fastapi.responses import JSONResponse, StreamingResponse
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-import torch
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from langchain_core.messages import (
+    BaseMessage,
     HumanMessage,
     AIMessage,
     AIMessageChunk,
+    ToolMessage,
 )
-from langchain_groq import ChatGroq
 from langgraph.checkpoint.base import BaseCheckpointSaver
-from app.agent_graph import AgentGraph
+from app.core import telemetry
+from app.core.agent_runtime import AgentRuntime
 from app.core.settings import settings
+from app.core.cached_embeddings import CachedEmbeddings
 from app.core.chat_saver import ChatSaver
-from app.dependencies.auth import get_current_user
+from app.core.checkpoint_compaction import CheckpointCompactor
+from app.core.chunking import MarkdownChunker, approximate_tokens, load_token_counter
+from app.core.components import LazyComponent, LazyEmbeddings, warm_up
+from app.core.embedding_backends import collection_name, embedding_key, load_embeddings
+from app.core.context_window import ContextPolicy
+from app.core.embedding_queue import EmbeddingQueue
+from app.core.indexes import ensure_indexes
+from app.core.lexical_index import LexicalIndex
+from app.core.locks import Leadership, MongoLocks
+from app.core.llm_gateway import LLMGateway, Provider, TokenBucket
+from app.core.logging import configure_logging
+from app.core.note_import import NoteImporter
+from app.core.note_index import NoteIndexer
+from app.core.reindex import EmbeddingBackfill
+from app.core.response_cache import SemanticResponseCache, context_key
+from app.core.search_cache import SearchCache
+from app.core.vector_store import create_chroma_client, create_vectorstore
+from app.dependencies.agent import get_agent, get_memory
+from app.dependencies.auth import get_current_user, token_cache, user_cache
 from app.models.chat import ChatModel
+from app.models.chat_page import ChatPageModel
 from app.models.note import NoteModel
+from app.models.note_page import NotePageModel, NoteSearchModel
 from app.models.query_request import ChatResponseRequest
 from app.models.update_title_request import UpdateChatRequest
 from app.routes import auth
 from app.tools.notes import NotesTool
-from app.core.database import chats_collection, notes_collection, users_collection
-from app.utils.base_checkpoint_saver import aget_messages
-
-embedding_model = HuggingFaceEmbeddings(
-    model_name='nomic-ai/nomic-embed-text-v2-moe',
-    model_kwargs={
-        'device': 'cuda' if torch.cuda.is_available() else 'cpu',
-        'trust_remote_code': True,
-    },
-    encode_kwargs={'normalize_embeddings': True},
+from app.core.database import (
+    db_client,
+    chats_collection,
+    chats_cp_collection,
+    chats_cp_writes_collection,
+    notes_collection,
+    users_collection,
+    locks_collection,
 )
+from app.utils.base_checkpoint_saver import aget_messages, aget_messages_iter, aget_messages_page
+from app.utils.cache import TTLCache
+from app.utils.pagination import encode_cursor, keyset_filter
+from app.utils.streaming import StreamEvent, aiter_lines, coalesce_tokens, to_sse, to_text
+
+configure_logging(settings.log_level, settings.log_json)
+telemetry.configure(settings.telemetry_enabled)
+
+logger = logging.getLogger(__name__)
+
+def load_embedding_model():
+    return load_embeddings(
+        settings.embedding_model,
+        settings.embedding_backend,
+        dimensions=settings.embedding_dimensions,
+        onnx_file=settings.embedding_onnx_file,
+    )
+
+embedding_model = LazyComponent('embedding_model', load_embedding_model)
+
+current_embedding_key = embedding_key(settings.embedding_model, settings.embedding_backend, settings.embedding_dimensions)
+
+query_embeddings = CachedEmbeddings(
+    LazyEmbeddings(embedding_model),
+    current_embedding_key,
+    TTLCache(settings.query_cache_size, settings.query_cache_ttl),
+)
+
+chroma_client = LazyComponent('chroma_client', lambda: create_chroma_client(
+    settings.chroma_host,
+    settings.chroma_port,
+    settings.chroma_ssl,
+    settings.chroma_persist_directory,
+))
+
+def load_vectorstore():
+    return create_vectorstore(
+        chroma_client.get(),
+        collection_name(current_embedding_key),
+        query_embeddings,
+    )
+
+vectorstore = LazyComponent('vectorstore', load_vectorstore)
+
+# A Chroma server is shared with other workers whose writes this process
+# never sees. Note writes are then serialized through per-note locks, the
+# BM25 index is rebuilt every `lexical_reload_interval` seconds, cached
+# search results may lag other workers' writes by up to `search_cache_ttl`,
+# and the response cache, whose invalidation is per process, is disabled.
+shared_vectorstore = settings.chroma_host is not None
+
+locks = MongoLocks(locks_collection, ttl=settings.leader_lock_ttl)
+
+search_cache = SearchCache(TTLCache(settings.search_cache_size, settings.search_cache_ttl))
 
-vectorstore = Chroma(
-    collection_name='notes',
-    embedding_function=embedding_model,
-    persist_directory='./chroma_db'
+lexical_index = LexicalIndex()
+
+note_indexer = NoteIndexer(vectorstore, search_cache, lexical_index)
+
+tokenizer = LazyComponent(
+    'tokenizer',
+    lambda: load_token_counter(settings.chunk_tokenizer or settings.embedding_model),
+)
+
+chunker = MarkdownChunker(
+    lambda text: tokenizer.get()(text),
+    max_tokens=settings.chunk_max_tokens,
+    overlap_tokens=settings.chunk_overlap_tokens,
+)
+
+def note_text(note: NoteModel) -> str:
+    return f'# {note.title}\n\n{note.content}'
+
+embedding_queue = EmbeddingQueue(
+    note_indexer,
+    LazyEmbeddings(embedding_model),
+    chunker.split_text,
+    batch_size=settings.embedding_batch_size,
+    max_jobs=settings.embedding_max_jobs,
+    workers=settings.embedding_workers,
+    locks=locks if shared_vectorstore else None,
+    lock_ttl=settings.note_lock_ttl,
 )
 
-llm = ChatGroq(
-    model='llama-3.1-8b-instant',
-    api_key=settings.llm_api_key,
-    temperature=0.25,
-    streaming=True,
+response_cache = SemanticResponseCache(
+    query_embeddings,
+    threshold=settings.response_cache_threshold,
+    ttl=settings.response_cache_ttl,
+    max_entries_per_user=settings.response_cache_max_entries_per_user,
+) if settings.response_cache_enabled and not shared_vectorstore else None
+
+if shared_vectorstore and settings.response_cache_enabled:
+    logger.warning('the response cache is disabled with a shared chroma server')
+
+embedding_backfill = EmbeddingBackfill(
+    notes_collection,
+    embedding_queue,
+    note_text,
+    current_embedding_key,
+    max_pending=settings.import_max_pending_embeddings,
 )
 
-app = FastAPI()
+note_importer = NoteImporter(
+    notes_collection,
+    embedding_queue,
+    note_text,
+    batch_size=settings.import_batch_size,
+    max_pending_embeddings=settings.import_max_pending_embeddings,
+    on_embedded=embedding_backfill.stamp(),
+)
+
+checkpoint_compactor = CheckpointCompactor(
+    chats_cp_collection,
+    chats_cp_writes_collection,
+    keep=settings.checkpoint_keep,
+    threads_per_second=settings.checkpoint_compaction_threads_per_second,
+    sweep_interval=settings.checkpoint_sweep_interval,
+)
+
+def load_llm():
+    from langchain_groq import ChatGroq
+
+    providers = [
+        Provider(
+            'groq',
+            # retries are left to the gateway, which knows whether a token was streamed
+            ChatGroq(
+                model=settings.llm_model,
+                api_key=settings.llm_api_key,
+                temperature=0.25,
+                streaming=True,
+                max_retries=0,
+            ),
+            TokenBucket(settings.llm_requests_per_minute / 60, settings.llm_burst)
+            if settings.llm_requests_per_minute else None,
+        ),
+    ]
+    if settings.llm_fallback_model:
+        from langchain_ollama import ChatOllama
+
+        providers.append(Provider(
+            'ollama',
+            ChatOllama(model=settings.llm_fallback_model, base_url=settings.ollama_base_url, temperature=0.25),
+        ))
+    return LLMGateway(
+        providers,
+        max_concurrency=settings.llm_max_concurrency,
+        max_retries=settings.llm_max_retries,
+        backoff=settings.llm_retry_backoff,
+        max_backoff=settings.llm_retry_max_backoff,
+        first_token_timeout=settings.llm_first_token_timeout,
+    )
+
+llm = LazyComponent('llm', load_llm)
+
+def load_agent(memory: BaseCheckpointSaver) -> AgentRuntime:
+    tools = [
+        NotesTool(
+            vectorstore=vectorstore,
+            search_cache=search_cache,
+            lexical_index=lexical_index,
+            fetch_k=settings.search_fetch_k,
+            fast_path_max_terms=settings.lexical_fast_path_max_terms,
+            max_queries=settings.search_max_queries,
+            max_tokens=settings.search_max_tokens,
+            min_relevance=settings.search_min_relevance,
+            mmr_lambda=settings.search_mmr_lambda,
+            count_tokens=load_token_counter(settings.llm_tokenizer) if settings.llm_tokenizer else approximate_tokens,
+        )
+    ]
+    context = ContextPolicy(
+        max_tokens=settings.context_max_tokens,
+        tool_message_max_chars=settings.context_tool_message_max_chars,
+        summarize=settings.context_summarize,
+        summary_trigger_messages=settings.context_summary_trigger_messages,
+    )
+    return AgentRuntime(llm.get(), tools, memory, context)
+
+def load_lexical_index():
+    lexical_index.load(vectorstore.get())
+
+async def reload_lexical_index():
+    """Keep the BM25 index in step with other workers writing to a shared Chroma server."""
+    while True:
+        await asyncio.sleep(settings.lexical_reload_interval)
+        if not lexical_index.ready:
+            continue
+        try:
+            await asyncio.to_thread(lexical_index.reload, vectorstore.get())
+        except Exception:
+            logger.exception('lexical index reload failed')
+
+async def backfill_embeddings():
+    await embedding_backfill.adopt_legacy(await chroma_client.aget())
+    await embedding_backfill.run()
+
+background_tasks = set()
+
+async def start_background_tasks():
+    """Run on the leader only, so workers do not repeat the same sweep and backfill."""
+    if settings.embedding_backfill:
+        backfill = asyncio.create_task(backfill_embeddings())
+        backfill.add_done_callback(log_background_failure)
+        backfill.add_done_callback(background_tasks.discard)
+        background_tasks.add(backfill)
+    if settings.checkpoint_compaction_enabled:
+        checkpoint_compactor.start()
+
+async def stop_background_tasks():
+    await checkpoint_compactor.stop()
+    for task in list(background_tasks):
+        task.cancel()
+
+leadership = Leadership(locks, 'background', start_background_tasks, stop_background_tasks)
+
+def log_background_failure(task: asyncio.Task):
+    if not task.cancelled() and (error := task.exception()) is not None:
+        logger.error('background task failed', exc_info=error)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    memory = ChatSaver.from_client(db_client)
+    agent = LazyComponent('agent', lambda: load_agent(memory))
+    app.state.memory = memory
+    app.state.agent = agent
+    app.state.components = [embedding_model, tokenizer, vectorstore, llm, agent]
+    await ensure_indexes()
+
+    lexical_load = asyncio.create_task(asyncio.to_thread(load_lexical_index))
+    lexical_load.add_done_callback(log_background_failure)
+    background = [lexical_load]
+    if shared_vectorstore:
+        background.append(asyncio.create_task(reload_lexical_index()))
+    if settings.warm_up:
+        background.append(asyncio.create_task(warm_up(app.state.components)))
+    embedding_queue.start()
+    leadership.start()
+    yield
+    await leadership.stop()
+    await embedding_queue.stop()
+    for task in background:
+        task.cancel()
+
+app = FastAPI(lifespan=lifespan)
+
+async def timed_body(body, done):
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        done()
+
+if settings.telemetry_enabled:
+    @app.middleware('http')
+    async def time_requests(request: Request, call_next):
+        start = time.perf_counter()
+
+        def record(status_code: int):
+            route = request.scope.get('route')
+            telemetry.request_seconds.observe(
+                time.perf_counter() - start,
+                method=request.method,
+                route=route.path if route else 'unmatched',
+                status=status_code,
+            )
+
+        try:
+            response = await call_next(request)
+        except BaseException:
+            record(500)
+            raise
+        # Streamed routes such as /chats/{id}/respond are only done once the body is sent.
+        response.body_iterator = timed_body(response.body_iterator, lambda: record(response.status_code))
+        return response
 
 @app.get('/')
 def get_root():
     return {'message': 'Hello, FastAPI!'}
 
+@app.get('/ready')
+def get_ready():
+    components = {component.name: component.status() for component in app.state.components}
+    components['lexical_index'] = lexical_index.status()
+    ready = all(component['status'] == 'loaded' for component in components.values())
+    return JSONResponse(
+        content={'ready': ready, 'components': components},
+        status_code=200 if ready else 503,
+    )
+
+@app.get('/cache/stats')
+def get_cache_stats():
+    return {
+        'query_embeddings': query_embeddings.cache.stats(),
+        'search_results': search_cache.cache.stats(),
+        'users': user_cache.stats(),
+        'tokens': token_cache.stats(),
+        'responses': response_cache.stats() if response_cache else None,
+    }
+
+def collect_cache_stats():
+    return [
+        ({'cache': name, 'stat': stat}, value)
+        for name, stats in get_cache_stats().items()
+        if stats is not None
+        for stat, value in stats.items()
+        if isinstance(value, (int, float))
+    ]
+
+telemetry.registry.register(telemetry.Gauges('notegenie_cache', 'Cache counters by cache and stat.', collect_cache_stats))
+telemetry.registry.register(telemetry.Gauges(
+    'notegenie_embedding_queue_pending',
+    'Embedding jobs queued or running.',
+    lambda: [({}, embedding_queue.pending)],
+))
+
+def collect_checkpoint_stats():
+    stats = checkpoint_compactor.stats()
+    return [
+        ({'reason': reason, 'stat': stat}, stats[reason][stat])
+        for reason in ('compacted', 'deleted')
+        for stat in ('threads', 'checkpoints', 'writes', 'bytes')
+    ]
+
+telemetry.registry.register(telemetry.Gauges(
+    'notegenie_checkpoints_reclaimed',
+    'Checkpoint threads, documents and bytes removed since start-up.',
+    collect_checkpoint_stats,
+))
+
+def collect_llm_stats():
+    if not llm.loaded or not isinstance(gateway := llm.get(), LLMGateway):
+        return []
+    stats = gateway.stats()
+    return [({'provider': '', 'stat': 'waiting'}, stats['waiting'])] + [
+        ({'provider': provider, 'stat': stat}, value)
+        for provider, counts in stats['providers'].items()
+        for stat, value in counts.items()
+    ]
+
+telemetry.registry.register(telemetry.Gauges(
+    'notegenie_llm',
+    'LLM gateway requests, retries, errors, timeouts and fallbacks by provider, and requests waiting for a slot.',
+    collect_llm_stats,
+))
+
+@app.get('/checkpoints/stats')
+def get_checkpoint_stats():
+    return checkpoint_compactor.stats()
+
+@app.get('/embeddings/backfill')
+def get_embedding_backfill():
+    return embedding_backfill.stats()
+
+@app.get('/metrics', response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(telemetry.registry.render(), media_type='text/plain; version=0.0.4')
+
 @app.get('/test')
 async def test():
     try:
         pass
     except Exception as e:
-        print(e)
-        raise HTTPException(status_code=500)
+        logger.exception('test endpoint failed')
+        raise HTTPException(status_code=500) from e
     return {'message': 'success'}
 
-async def generate_response(message: str, id: ObjectId):
-    chat_id = str(id)
+def to_chat_message(message: BaseMessage):
+    if isinstance(message, HumanMessage):
+        return {
+            'data': message.content,
+            'role': 'user'
+        }
+    elif isinstance(message, AIMessage):
+        return {
+            'data': message.content,
+            'role': 'bot'
+        }
+    return None
+
+async def find_user_chat(id: str, user_id: str):
+    try:
+        obj_id = ObjectId(id)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail='Invalid chat ID') from e
 
-    tools = [NotesTool(vectorstore=vectorstore)]
-    llm_with_tools = llm.bind_tools(
-        tools=tools,
-    )
-    async with ChatSaver.create() as memory:
-        memory: BaseCheckpointSaver
-        graph = AgentGraph.create_graph(llm_with_tools, tools, memory)
-        config = {'configurable': {'thread_id': chat_id}}
-        result = graph.astream(
-            input={
-                'messages': [HumanMessage(message)]
-            },
-            config=config,
-            stream_mode='messages',
-        )
+    chat = await chats_collection.find_one({'_id': obj_id, 'user_id': user_id}, {'messages': 0})
+    if not chat:
+        raise HTTPException(status_code=404, detail='Chat not found')
 
-        chunks = []
+    chat['_id'] = str(chat['_id'])
+    return chat
 
-        async for chunk in result:
-            # print(f'chunk: {chunk}')
-            chunk = chunk[0]
-            content = chunk.content
-            if isinstance(chunk, AIMessageChunk):
-                chunks.append(content)
-                yield content
-            else:
-                print(f'other chunk: {type(chunk)}')
+async def touch_chat(id: ObjectId):
+    await chats_collection.update_one(
+        {'_id': id},
+        {'$set': {'updated_at': datetime.now(timezone.utc)}},
+    )
+    if settings.checkpoint_compaction_enabled:
+        checkpoint_compactor.mark(str(id))
+
+async def replay_cached_response(message: str, response: str, chat_id: str, user_id: str, agent: AgentRuntime):
+    await agent.graph.aupdate_state(
+        agent.config(chat_id, user_id),
+        {'messages': [HumanMessage(message), AIMessage(response)]},
+        as_node='chatbot',
+    )
+    for token in re.split(r'(?<=\s)', response):
+        if token:
+            yield StreamEvent('token', token)
 
-    response = ''.join(chunks)
+async def chat_context(agent: AgentRuntime, chat_id: str, user_id: str) -> str:
+    """Key of what the model sees of the chat before this turn."""
+    state = await agent.graph.aget_state(agent.config(chat_id, user_id))
+    return context_key(agent.context.window(state.values.get('messages', [])), state.values.get('summary', ''))
 
-    print(f'final response: {response}')
-    
-    print('finished')
+async def generate_events(message: str, id: ObjectId, user_id: str, agent: AgentRuntime):
+    chat_id = str(id)
+    started_at = time.perf_counter()
+
+    cache_version = note_indexer.version(user_id)
+    cache_context = await chat_context(agent, chat_id, user_id) if response_cache else None
+    if response_cache and (cached := await response_cache.lookup(user_id, message, cache_version, cache_context)) is not None:
+        async for event in replay_cached_response(message, cached, chat_id, user_id, agent):
+            yield event
+        await touch_chat(id)
+        yield StreamEvent('done', {'chat_id': chat_id, 'cached': True})
+        return
+
+    tokens = [] if response_cache else None
+    first_token_at = None
+    result = agent.graph.astream(
+        input={
+            'messages': [HumanMessage(message)]
+        },
+        config=agent.config(chat_id, user_id),
+        stream_mode='messages',
+    )
 
-@app.post('/chats/{id}/respond')
-async def create_chat_response(id: str, request: ChatResponseRequest):
     try:
-        id = ObjectId(id)
-    except:
-        raise HTTPException(status_code=400, detail='Invalid chat ID')
+        async for chunk, metadata in result:
+            node = metadata.get('langgraph_node')
+            if node == 'chatbot' and isinstance(chunk, AIMessageChunk):
+                for tool_call in chunk.tool_call_chunks:
+                    if tool_call.get('name'):
+                        yield StreamEvent('tool_call', {'id': tool_call.get('id'), 'name': tool_call['name']})
+                if chunk.content:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        telemetry.observe('chat.first_token', first_token_at - started_at)
+                    if tokens is not None:
+                        tokens.append(chunk.content)
+                    yield StreamEvent('token', chunk.content)
+            elif node == 'tools' and isinstance(chunk, ToolMessage):
+                yield StreamEvent('tool_result', {'id': chunk.tool_call_id, 'name': chunk.name})
+    finally:
+        await result.aclose()
+
+    elapsed = time.perf_counter() - started_at
+    telemetry.observe('chat.stream', elapsed)
+    await touch_chat(id)
+
+    if tokens:
+        await response_cache.store(user_id, message, ''.join(tokens), cache_version, cache_context, elapsed)
+
+    yield StreamEvent('done', {'chat_id': chat_id, 'cached': False})
+
+    logger.info('chat response finished', extra={'chat_id': chat_id, 'elapsed': round(elapsed, 3)})
 
-    chat = chats_collection.find_one({'_id': id,})
-    if not chat:
-        raise HTTPException(status_code=404, detail='Chat not found')
+@app.post('/chats/{id}/respond')
+async def create_chat_response(
+    id: str,
+    request: ChatResponseRequest,
+    mode: Literal['text', 'sse'] = 'text',
+    current_user: str=Depends(get_current_user),
+    agent: AgentRuntime=Depends(get_agent),
+):
+    user_id = str(current_user['_id'])
+    chat = await find_user_chat(id, user_id)
 
-    return StreamingResponse(generate_response(request.message, id), media_type='text/plain')
+    events = coalesce_tokens(
+        generate_events(request.message, ObjectId(chat['_id']), user_id, agent),
+        max_delay=settings.stream_flush_interval,
+        max_chars=settings.stream_flush_chars,
+        max_pending=settings.stream_max_pending_events,
+    )
+
+    if mode == 'sse':
+        return StreamingResponse(
+            to_sse(events),
+            media_type='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        )
+    return StreamingResponse(to_text(events), media_type='text/plain')
 
 @app.post('/chats')
 async def create_chat(chat: ChatModel, current_user: str=Depends(get_current_user)):
     chat_dict = chat.model_dump(by_alias=True, exclude=['id'])
     user_id = str(current_user['_id'])
     chat_dict['user_id'] = user_id
+    chat_dict['updated_at'] = datetime.now(timezone.utc)
     result = await chats_collection.insert_one(chat_dict)
     return {'id': str(result.inserted_id)}
 
 @app.get('/chats/{id}', response_model=ChatModel)
-async def get_chat(id: str, current_user: str=Depends(get_current_user)):
+async def get_chat(id: str, current_user: str=Depends(get_current_user), memory: BaseCheckpointSaver=Depends(get_memory)):
     user_id = str(current_user['_id'])
-    chat = await chats_collection.find_one({'_id': id, 'user_id': user_id})
-    if not chat:
-        raise HTTPException(status_code=404, detail='Chat not found')
+    chat = await find_user_chat(id, user_id)
 
-    chat['_id'] = str(chat['_id'])
+    chat_history = await aget_messages(memory, AgentRuntime.config(chat['_id']))
+    messages = []
+    for message in chat_history:
+        if message_object := to_chat_message(message):
+            messages.append(message_object)
 
-    async with ChatSaver.create() as memory:
-        memory: BaseCheckpointSaver
-        config = {'configurable': {'thread_id': str(id)}}
-        chat_history = await aget_messages(memory, config)
-        messages = []
-        for message in chat_history:
-            message_object = None
-            if isinstance(message, HumanMessage):
-                message_object = {
-                    'data': message.content,
-                    'role': 'user'
-                }
-            elif isinstance(message, AIMessage):
-                message_object = {
-                    'data': message.content,
-                    'role': 'bot'
-                }
-
-            if message_object:
-                messages.append(message_object)
-
-        chat['messages'] = messages
-        print('messages assigned to chat')
+    chat['messages'] = messages
     return chat
 
+@app.get('/chats/{id}/messages')
+async def get_chat_messages(
+    id: str,
+    limit: int = Query(default=50, ge=1, le=200),
+    before: Optional[int] = Query(default=None, ge=0),
+    current_user: str=Depends(get_current_user),
+    memory: BaseCheckpointSaver=Depends(get_memory),
+):
+    user_id = str(current_user['_id'])
+    chat = await find_user_chat(id, user_id)
+
+    page, next_before = await aget_messages_page(memory, AgentRuntime.config(chat['_id']), limit, before)
+    return {
+        'messages': [to_chat_message(message) for message in page],
+        'next_before': next_before,
+    }
+
+@app.get('/chats/{id}/messages/stream')
+async def stream_chat_messages(id: str, current_user: str=Depends(get_current_user), memory: BaseCheckpointSaver=Depends(get_memory)):
+    """Every message of the chat as NDJSON.
+
+    Only the response body is streamed, so memory for the encoded response
+    stays flat; the checkpoint is still loaded whole before the first
+    byte, so time to first byte grows with the thread. Use
+    /chats/{id}/messages pages when that matters.
+    """
+    user_id = str(current_user['_id'])
+    chat = await find_user_chat(id, user_id)
+
+    messages = await aget_messages_iter(memory, AgentRuntime.config(chat['_id']))
 
-@app.get('/chats', response_model=List[ChatModel])
-async def get_chats(current_user: str=Depends(get_current_user)):
+    def generate():
+        for message in messages:
+            yield json.dumps(to_chat_message(message)) + '\n'
+
+    return StreamingResponse(generate(), media_type='application/x-ndjson')
+
+
+@app.get('/chats', response_model=ChatPageModel)
+async def get_chats(
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user: str=Depends(get_current_user),
+):
     user_id = str(current_user['_id'])
-    chats = await chats_collection.find({'user_id': user_id}, {'messages': 0}).to_list(None)
-    for chat in chats:
-        chat['_id'] = str(chat['_id'])
-    return chats
+    try:
+        query = {'user_id': user_id, **keyset_filter('updated_at', cursor)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail='Invalid cursor') from e
+
+    chats = await chats_collection.find(
+        query,
+        {'title': 1, 'updated_at': 1},
+    ).sort(
+        [('updated_at', -1), ('_id', -1)]
+    ).limit(limit + 1).to_list(limit + 1)
+
+    next_cursor = None
+    if len(chats) > limit:
+        chats = chats[:limit]
+        last = chats[-1]
+        next_cursor = encode_cursor(last['updated_at'], last['_id'])
+
+    return {'chats': chats, 'next_cursor': next_cursor}
 
 @app.put('/chats/{id}')
 async def update_chat_title(id: str, chat: UpdateChatRequest, current_user: str=Depends(get_current_user)):
@@ -171,11 +647,11 @@ async def update_chat_title(id: str, chat: UpdateChatRequest, current_user: str=
     except Exception as e:
         raise HTTPException(status_code=400, detail='Invalid chat ID') from e
     
-    user_id = current_user['_id']
+    user_id = str(current_user['_id'])
 
     result = await chats_collection.update_one(
         {'_id': id, 'user_id': user_id},
-        {'$set': {'title': chat.title}}
+        {'$set': {'title': chat.title, 'updated_at': datetime.now(timezone.utc)}}
     )
 
     if result.matched_count == 0:
@@ -191,19 +667,65 @@ async def delete_chat(id: str, current_user: str=Depends(get_current_user)):
     except Exception as e:
         raise HTTPException(status_code=400, detail='Invalid chat ID') from e
 
-    user_id = current_user['_id']
+    user_id = str(current_user['_id'])
 
     result = await chats_collection.delete_one({'_id': id, 'user_id': user_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail='Chat not found')
 
+    await checkpoint_compactor.delete_thread(str(id))
+
     return {'message': 'Chat deleted successfully'}
 
+@app.get('/notes', response_model=NotePageModel)
+async def get_notes(
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user: str=Depends(get_current_user),
+):
+    user_id = str(current_user['_id'])
+    try:
+        query = {'user_id': user_id, **keyset_filter('updated_at', cursor)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail='Invalid cursor') from e
+
+    notes = await notes_collection.find(
+        query,
+        {'title': 1, 'updated_at': 1},
+    ).sort(
+        [('updated_at', -1), ('_id', -1)]
+    ).limit(limit + 1).to_list(limit + 1)
+
+    next_cursor = None
+    if len(notes) > limit:
+        notes = notes[:limit]
+        last = notes[-1]
+        next_cursor = encode_cursor(last['updated_at'], last['_id'])
+
+    return {'notes': notes, 'next_cursor': next_cursor}
+
+@app.get('/notes/search', response_model=NoteSearchModel)
+async def search_notes(
+    q: str = Query(min_length=1, max_length=512),
+    limit: int = Query(default=20, ge=1, le=100),
+    current_user: str=Depends(get_current_user),
+):
+    user_id = str(current_user['_id'])
+    notes = await notes_collection.find(
+        {'user_id': user_id, '$text': {'$search': q}},
+        {'title': 1, 'updated_at': 1, 'score': {'$meta': 'textScore'}},
+    ).sort(
+        [('score', {'$meta': 'textScore'})]
+    ).limit(limit).to_list(limit)
+
+    return {'notes': notes}
+
 @app.post('/notes')
 async def create_note(note: NoteModel, current_user: str=Depends(get_current_user)):
     note_dict = note.model_dump(by_alias=True, exclude=['id'])
     user_id = str(current_user['_id'])
     note_dict['user_id'] = user_id
+    note_dict['updated_at'] = datetime.now(timezone.utc)
 
     try:
         result = await notes_collection.insert_one(note_dict)
@@ -225,7 +747,7 @@ async def update_note(id: str, note: NoteModel, current_user: str=Depends(get_cu
     user_id = str(current_user['_id'])
     result = await notes_collection.update_one(
         {'_id': obj_id, 'user_id': user_id},
-        {'$set': {'title': note.title, 'content': note.content}}
+        {'$set': {'title': note.title, 'content': note.content, 'updated_at': datetime.now(timezone.utc)}}
     )
 
     if result.matched_count == 0:
@@ -233,6 +755,28 @@ async def update_note(id: str, note: NoteModel, current_user: str=Depends(get_cu
 
     return {'message': 'Note updated successfully'}
 
+@app.post('/notes/import')
+async def import_notes(request: Request, current_user: str=Depends(get_current_user)):
+    job = note_importer.create(str(current_user['_id']))
+    try:
+        await note_importer.run(job, aiter_lines(request.stream(), settings.import_max_line_bytes))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail='Something went wrong') from e
+
+    return JSONResponse(content=job.to_dict(), status_code=202)
+
+@app.get('/notes/import')
+async def get_note_imports(current_user: str=Depends(get_current_user)):
+    return [job.to_dict() for job in note_importer.list(str(current_user['_id']))]
+
+@app.get('/notes/import/{job_id}')
+async def get_note_import(job_id: str, current_user: str=Depends(get_current_user)):
+    job = note_importer.get(job_id)
+    if not job or job.user_id != str(current_user['_id']):
+        raise HTTPException(status_code=404, detail='Import not found')
+
+    return job.to_dict()
+
 @app.post('/notes/{id}/embed')
 async def update_note_embeddings(id: str, note: NoteModel, current_user: str=Depends(get_current_user)):
     try:
@@ -246,22 +790,21 @@ async def update_note_embeddings(id: str, note: NoteModel, current_user: str=Dep
     if not search_result:
         raise HTTPException(status_code=404, detail='Note not found')
     
-    text = note.model_dump_json(exclude=['id'])
+    text = note_text(note)
+    stored = note_text(NoteModel.model_validate(search_result))
+    job = embedding_queue.submit(id, user_id, text, embedding_backfill.stamp(None if text == stored else text))
 
-    await vectorstore.adelete(
-        where={'note_id': id}
+    return JSONResponse(
+        content={'job_id': job.id, 'status': job.status},
+        status_code=202,
     )
 
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1024, chunk_overlap=0, keep_separator='end')
-    chunks = text_splitter.split_text(text)
+@app.get('/embeddings/jobs/{job_id}')
+async def get_embedding_job(job_id: str, current_user: str=Depends(get_current_user)):
+    job = embedding_queue.get(job_id)
+    if not job or job.user_id != str(current_user['_id']):
+        raise HTTPException(status_code=404, detail='Job not found')
 
-    try:
-        await vectorstore.aadd_texts(
-            texts=chunks,
-            metadatas=[{'note_id': id, 'index': i} for i in range(len(chunks))],
-        )
-        return {'message': 'Note embeddings updated successfully'}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail='Something went wrong')
+    return job.to_dict()
 
 app.include_router(auth.router)
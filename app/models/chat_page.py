@@ -0,0 +1,14 @@
+import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from app.types.py_object_id import PyObjectId
+
+
+class ChatSummaryModel(BaseModel):
+    id: PyObjectId = Field(alias='_id')
+    title: str = 'Untitled'
+    updated_at: Optional[datetime.datetime] = None
+
+class ChatPageModel(BaseModel):
+    chats: List[ChatSummaryModel]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,20 @@
+import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from app.types.py_object_id import PyObjectId
+
+
+class NoteSummaryModel(BaseModel):
+    id: PyObjectId = Field(alias='_id')
+    title: str = 'Untitled'
+    updated_at: Optional[datetime.datetime] = None
+
+class NotePageModel(BaseModel):
+    notes: List[NoteSummaryModel]
+    next_cursor: Optional[str] = None
+
+class NoteSearchResultModel(NoteSummaryModel):
+    score: float
+
+class NoteSearchModel(BaseModel):
+    notes: List[NoteSearchResultModel]
@@ -1,24 +1,47 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from app.dependencies.auth import get_current_user, invalidate_user
 from app.models.user.create import UserCreate
 from app.models.user.login import UserLogin
-from app.utils.auth import hash_password, verify_password
+from app.models.user.password_change import PasswordChange
+from app.utils.auth import PasswordHasherBusy, ahash_password, averify_password
 from app.utils.jwt import create_access_token
 from app.core.database import users_collection
 
 router = APIRouter()
 
+def busy_error() -> HTTPException:
+    return HTTPException(status_code=503, detail='busy', headers={'Retry-After': '1'})
+
 @router.post('/sign-up')
 async def sign_up(user: UserCreate):
     if await users_collection.find_one({'email': user.email}):
         raise HTTPException(status_code=400, detail='already_exists')
-    hashed_pw = hash_password(user.password)
+    try:
+        hashed_pw = await ahash_password(user.password)
+    except PasswordHasherBusy as e:
+        raise busy_error() from e
     await users_collection.insert_one({'email': user.email, 'hashed_password': hashed_pw})
     return {'message': 'success'}
 
 @router.post('/sign-in')
 async def sign_in(user: UserLogin):
     db_user = await users_collection.find_one({'email': user.email})
-    if not db_user or not verify_password(user.password, db_user['hashed_password']):
-        raise HTTPException(status_code=401, detail='invalid_credentials')
+    try:
+        if not db_user or not await averify_password(user.password, db_user['hashed_password']):
+            raise HTTPException(status_code=401, detail='invalid_credentials')
+    except PasswordHasherBusy as e:
+        raise busy_error() from e
     token = create_access_token({'sub': str(db_user['_id'])})
     return {'access_token': token, 'token_type': 'bearer'}
+
+@router.put('/password')
+async def change_password(change: PasswordChange, current_user: dict = Depends(get_current_user)):
+    try:
+        if not await averify_password(change.current_password, current_user['hashed_password']):
+            raise HTTPException(status_code=401, detail='invalid_credentials')
+        hashed_pw = await ahash_password(change.new_password)
+    except PasswordHasherBusy as e:
+        raise busy_error() from e
+    await users_collection.update_one({'_id': current_user['_id']}, {'$set': {'hashed_password': hashed_pw}})
+    invalidate_user(current_user['_id'])
+    return {'message': 'success'}
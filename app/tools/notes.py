@@ -1,40 +1,259 @@
+import asyncio
 import json
+import logging
+import re
 from langchain.tools import BaseTool
 from langchain.vectorstores import VectorStore
-from typing import Type
+from langchain_core.documents import Document
+from langchain_core.runnables.config import RunnableConfig
+from typing import Callable, Dict, List, Optional, Tuple, Type
 from pydantic import BaseModel, Field, PrivateAttr
+from app.core import telemetry
+from app.core.cached_embeddings import normalize_query
+from app.core.chunking import approximate_tokens
+from app.core.components import LazyComponent
+from app.core.lexical_index import LexicalIndex, tokenize
+from app.core.search_cache import SearchCache
+from app.utils.ranking import maximal_marginal_relevance, reciprocal_rank_fusion
+
+logger = logging.getLogger(__name__)
+
+def _chunk_key(doc: Document):
+    return (doc.metadata.get('note_id'), doc.metadata.get('index'))
+
+def _with_score(doc: Document, score: float) -> Document:
+    return Document(page_content=doc.page_content, metadata={**doc.metadata, 'score': round(score, 3)})
+
+def _stitch(previous: str, text: str) -> str:
+    """Join consecutive chunks of a note, dropping the repeated heading path
+    and the sentences the chunker carried over as overlap."""
+    head, _, body = text.partition('\n')
+    if body and all(
+        re.search(rf'^(?:#+\s+)?{re.escape(title)}\s*$', previous, re.MULTILINE)
+        for title in head.split(' > ')
+    ):
+        text = body
+    overlap, separator, rest = text.partition('\n\n')
+    if separator and overlap.strip() and previous.rstrip().endswith(overlap.strip()):
+        text = rest
+    return f'{previous}\n\n{text}'
 
 class NotesToolSearchInput(BaseModel):
-    query: str = Field(..., description='The query to search for notes')
+    queries: List[str] = Field(
+        ...,
+        min_length=1,
+        description='One short search query per distinct topic of the question',
+    )
 
 class NotesTool(BaseTool):
     name: str = 'notes_tool'
-    description: str = 'Searches for potentially relevant notes based on a query'
+    description: str = (
+        'Searches for potentially relevant notes. Pass every topic you need '
+        'as a separate query in a single call; they are searched in parallel.'
+    )
     args_schema: Type[BaseModel] = NotesToolSearchInput
 
-    _vectorstore: VectorStore = PrivateAttr()
+    _vectorstore: LazyComponent[VectorStore] = PrivateAttr()
+    _search_cache: Optional[SearchCache] = PrivateAttr(default=None)
+    _lexical_index: Optional[LexicalIndex] = PrivateAttr(default=None)
     _k: int = PrivateAttr(default=5)
-    
-    def __init__(self, vectorstore: VectorStore, k: int = 5):
+    _fetch_k: int = PrivateAttr(default=20)
+    _fast_path_max_terms: int = PrivateAttr(default=3)
+    _max_queries: int = PrivateAttr(default=5)
+    _max_tokens: int = PrivateAttr(default=1000)
+    _min_relevance: float = PrivateAttr(default=0.0)
+    _mmr_lambda: float = PrivateAttr(default=0.7)
+    _count_tokens: Callable[[str], int] = PrivateAttr(default=approximate_tokens)
+
+    def __init__(
+        self,
+        vectorstore: LazyComponent[VectorStore],
+        k: int = 5,
+        search_cache: Optional[SearchCache] = None,
+        lexical_index: Optional[LexicalIndex] = None,
+        fetch_k: int = 20,
+        fast_path_max_terms: int = 3,
+        max_queries: int = 5,
+        max_tokens: int = 1000,
+        min_relevance: float = 0.0,
+        mmr_lambda: float = 0.7,
+        count_tokens: Callable[[str], int] = approximate_tokens,
+    ):
         super().__init__()
         self._vectorstore = vectorstore
+        self._search_cache = search_cache
+        self._lexical_index = lexical_index
         self._k = k
+        self._fetch_k = fetch_k
+        self._fast_path_max_terms = fast_path_max_terms
+        self._max_queries = max_queries
+        self._max_tokens = max_tokens
+        self._min_relevance = min_relevance
+        self._mmr_lambda = mmr_lambda
+        self._count_tokens = count_tokens
 
-    def _run(self, query: str) -> str:
+    def _run(self, queries: List[str]) -> str:
         raise NotImplementedError()
 
-    async def _arun(self, query: str) -> str:
-        """Run a similarity search and return the top-k potentially relevant notes."""
-        
-        search_results = await self._vectorstore.asimilarity_search(query, k=self._k)
-        print('_arun was called')
-        print(f'query: {query}')
+    async def _search_many(self, queries: List[str], user_id: str) -> List[List[Document]]:
+        """Search several queries: cache and lexical lookups first, then one
+        embedding batch and concurrent vector searches for the rest."""
+        results: Dict[int, List[Document]] = {}
+        lexical: Dict[int, List[Document]] = {}
+        for i, query in enumerate(queries):
+            if self._search_cache and (cached := self._search_cache.get(user_id, query, self._k)) is not None:
+                results[i] = cached
+                continue
+
+            lexical_results = []
+            if self._lexical_index and self._lexical_index.ready:
+                with telemetry.span('search.lexical'):
+                    lexical_results = [doc for doc, _ in self._lexical_index.search(user_id, query, self._fetch_k)]
+
+            if self._is_keyword_query(query, lexical_results):
+                results[i] = self._diversify(lexical_results)
+                self._cache(user_id, query, results[i])
+            else:
+                lexical[i] = lexical_results
+
+        if lexical:
+            vectorstore = await self._vectorstore.aget()
+            pending = list(lexical)
+            embeddings = await self._embed_queries(vectorstore, [queries[i] for i in pending])
+            with telemetry.span('search.vector'):
+                dense = await asyncio.gather(*(
+                    asyncio.to_thread(self._dense_search, vectorstore, embedding, user_id)
+                    for embedding in embeddings
+                ))
+            for i, dense_results in zip(pending, dense):
+                results[i] = self._diversify(reciprocal_rank_fusion(
+                    [dense_results, lexical[i]],
+                    key=_chunk_key,
+                ))
+                self._cache(user_id, queries[i], results[i])
+
+        return [results[i] for i in range(len(queries))]
+
+    def _dense_search(self, vectorstore: VectorStore, embedding: List[float], user_id: str) -> List[Document]:
+        """The `fetch_k` nearest chunks scoring at least `min_relevance`, with the score in their metadata.
+
+        The collection uses cosine distance (see `create_vectorstore`), so
+        relevance is the cosine similarity, `1 - distance`.
+        """
+        hits = vectorstore.similarity_search_by_vector_with_relevance_scores(
+            embedding,
+            k=self._fetch_k,
+            filter={'user_id': user_id},
+        )
+        scored = [(doc, 1.0 - distance) for doc, distance in hits]
+        return [_with_score(doc, score) for doc, score in scored if score >= self._min_relevance]
+
+    def _diversify(self, ranking: List[Document]) -> List[Document]:
+        """The top `k` of a ranking, skipping chunks that mostly repeat ones already picked."""
+        if len(ranking) <= self._k or self._mmr_lambda >= 1:
+            return ranking[:self._k]
+        terms = {_chunk_key(doc): set(tokenize(doc.page_content)) for doc in ranking}
+
+        def similarity(a: Document, b: Document) -> float:
+            a, b = terms[_chunk_key(a)], terms[_chunk_key(b)]
+            return len(a & b) / len(a | b) if a and b else 0.0
+
+        return maximal_marginal_relevance(ranking, similarity, self._k, self._mmr_lambda)
+
+    @staticmethod
+    async def _embed_queries(vectorstore: VectorStore, queries: List[str]) -> List[List[float]]:
+        embeddings = vectorstore.embeddings
+        if hasattr(embeddings, 'aembed_queries'):
+            return await embeddings.aembed_queries(queries)
+        return await asyncio.gather(*(embeddings.aembed_query(query) for query in queries))
+
+    def _cache(self, user_id: str, query: str, documents: List[Document]):
+        if self._search_cache:
+            self._search_cache.set(user_id, query, self._k, documents)
+
+    def _is_keyword_query(self, query: str, lexical_results: List[Document]) -> bool:
+        """Short queries whose terms all occur in the best lexical hit skip the dense search."""
+        terms = set(tokenize(query))
+        if not terms or len(terms) > self._fast_path_max_terms or not lexical_results:
+            return False
+        return terms <= set(tokenize(lexical_results[0].page_content))
+
+    def _merge(self, rankings: List[List[Document]]) -> List[Document]:
+        """Interleave the per-query rankings, dropping repeated chunks."""
+        merged, seen = [], set()
+        for rank in range(max(map(len, rankings), default=0)):
+            for ranking in rankings:
+                if rank >= len(ranking) or (key := _chunk_key(ranking[rank])) in seen:
+                    continue
+                seen.add(key)
+                merged.append(ranking[rank])
+        return merged
+
+    @staticmethod
+    def _passages(docs: List[Document]) -> List[Tuple[str, Optional[float]]]:
+        """Merge chunks that are consecutive in the same note into one passage,
+        ordered by their best-ranked chunk and scored by their best score."""
+        by_key = {_chunk_key(doc): doc for doc in docs}
+        passages, used = [], set()
+        for doc in docs:
+            note_id, index = _chunk_key(doc)
+            if (note_id, index) in used:
+                continue
+            if not isinstance(index, int):
+                passages.append((doc.page_content, doc.metadata.get('score')))
+                continue
+            start = index
+            while (note_id, start - 1) in by_key and (note_id, start - 1) not in used:
+                start -= 1
+            run = []
+            while (note_id, start) in by_key and (note_id, start) not in used:
+                used.add((note_id, start))
+                run.append(by_key[(note_id, start)])
+                start += 1
+            text = run[0].page_content
+            for chunk in run[1:]:
+                text = _stitch(text, chunk.page_content)
+            scores = [chunk.metadata['score'] for chunk in run if chunk.metadata.get('score') is not None]
+            passages.append((text, max(scores) if scores else None))
+        return passages
+
+    def _render(self, passages: List[Tuple[str, Optional[float]]]) -> str:
+        """Format passages best first, stopping at `max_tokens`; the passage that
+        crosses the budget is cut at a word boundary if enough of it fits.
+
+        The budget is only as exact as `count_tokens`: strict with the chat
+        model's tokenizer, approximate with the default `approximate_tokens`."""
+        budget = self._max_tokens - self._count_tokens(json.dumps({'tool_status': 'active', 'search_results': ''}))
+        parts = []
+        for text, score in passages:
+            part = f'(relevance {score:.2f}) {text}' if score is not None else text
+            cost = self._count_tokens(json.dumps(part)) + 1
+            if cost > budget:
+                if budget >= 64:
+                    while part and self._count_tokens(json.dumps(part + ' …')) > budget:
+                        part = part[:int(len(part) * budget / cost)].rsplit(' ', 1)[0]
+                        cost = self._count_tokens(json.dumps(part + ' …'))
+                    if part:
+                        parts.append(part + ' …')
+                break
+            parts.append(part)
+            budget -= cost
+        return '\n\n'.join(parts)
+
+    async def _arun(self, queries: List[str], config: RunnableConfig) -> str:
+        """Search the current user's notes for every query and return the merged, deduplicated results."""
+
+        queries = list({normalize_query(query): query for query in queries if normalize_query(query)}.values())[:self._max_queries]
+        user_id = config.get('configurable', {}).get('user_id')
+        with telemetry.span('tool.notes'):
+            rankings = await self._search_many(queries, user_id) if user_id and queries else []
+        passages = self._passages(self._merge(rankings))
+        logger.debug('notes search', extra={'queries': queries, 'results': len(passages)})
         result = {
             'tool_status': 'active',
         }
-        print(f'found {len(search_results)} results')
-        if not search_results:
-            result['search_results'] = f'No search results for "{query}"'
+        if not passages:
+            result['search_results'] = 'No search results for ' + ', '.join(f'"{query}"' for query in queries)
         else:
-            result['search_results'] = '\n\n'.join([doc.page_content for doc in search_results])
+            result['search_results'] = self._render(passages)
         return json.dumps(result)
@@ -1,9 +1,53 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from passlib.context import CryptContext
+from app.core.settings import settings
 
-pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto', bcrypt__rounds=settings.bcrypt_rounds)
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+class PasswordHasher():
+    """Runs bcrypt on a bounded thread pool, off the event loop.
+
+    At most `workers` hashes run at once and `queue_size` more may wait;
+    beyond that `run` fails fast with PasswordHasherBusy. A slot is held
+    until the hash finishes on its thread, even if the caller is cancelled.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='bcrypt')
+        self._capacity = workers + queue_size
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self._capacity:
+                raise PasswordHasherBusy()
+            self._in_flight += 1
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future: Future):
+        with self._lock:
+            self._in_flight -= 1
+
+password_hasher = PasswordHasher(settings.password_hash_workers, settings.password_hash_queue_size)
+
+async def ahash_password(password: str) -> str:
+    return await password_hasher.run(hash_password, password)
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
@@ -1,29 +1,81 @@
-from typing import Optional
+from typing import Iterator, List, Optional, Tuple
 from langgraph.checkpoint.base import BaseCheckpointSaver, Checkpoint
 from langchain_core.runnables.config import RunnableConfig
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
 
 async def aget_messages(memory: BaseCheckpointSaver, config: RunnableConfig):
     return _extract_messages(await memory.aget(config))
 
-def _extract_messages(checkpoint: Optional[Checkpoint]):
+async def aget_messages_page(
+    memory: BaseCheckpointSaver,
+    config: RunnableConfig,
+    limit: int,
+    before: Optional[int] = None,
+) -> Tuple[List[BaseMessage], Optional[int]]:
+    """Return up to `limit` merged messages ending before raw message index `before`,
+    and the cursor for the page preceding them (None on the first page)."""
+    return _extract_page(_chat_history(await memory.aget(config)), limit, before)
+
+async def aget_messages_iter(memory: BaseCheckpointSaver, config: RunnableConfig) -> Iterator[BaseMessage]:
+    """Load the thread's latest checkpoint and iterate its merged messages.
+
+    The checkpoint holds the whole thread in one document, so it is read
+    and deserialized in full before the first message is available; only
+    the merging and whatever the caller does per message are incremental.
+    """
+    return _iter_messages(_chat_history(await memory.aget(config)))
+
+def _chat_history(checkpoint: Optional[Checkpoint]) -> list:
     if not checkpoint:
         return []
 
     if not (channel_values := checkpoint['channel_values']):
         return []
 
-    if not (chat_history := channel_values['messages']):
-        return []
+    return channel_values.get('messages') or []
+
+def _merge(messages: List[AIMessage]) -> AIMessage:
+    if len(messages) == 1:
+        return messages[0]
+    return AIMessage(''.join(message.content for message in messages))
 
-    result = []
+def _iter_messages(chat_history: list) -> Iterator[BaseMessage]:
+    """Human and AI messages in order, with consecutive AI messages merged in linear time."""
+    pending = []
     for message in chat_history:
         if isinstance(message, HumanMessage):
-            result.append(message)
+            if pending:
+                yield _merge(pending)
+                pending = []
+            yield message
         elif isinstance(message, AIMessage):
-            if result and isinstance(last_message:= result[-1], AIMessage):
-                result[-1] = AIMessage(last_message.content + message.content)
-                continue
-            result.append(message)
+            pending.append(message)
+    if pending:
+        yield _merge(pending)
+
+def _extract_messages(checkpoint: Optional[Checkpoint]):
+    return list(_iter_messages(_chat_history(checkpoint)))
+
+def _extract_page(chat_history: list, limit: int, before: Optional[int] = None):
+    i = len(chat_history) if before is None else max(0, min(before, len(chat_history)))
+    page = []
+    pending = []
+    while i > 0:
+        message = chat_history[i - 1]
+        if isinstance(message, HumanMessage):
+            if pending:
+                page.append(_merge(pending[::-1]))
+                pending = []
+            if len(page) >= limit:
+                break
+            page.append(message)
+        elif isinstance(message, AIMessage):
+            if not pending and len(page) >= limit:
+                break
+            pending.append(message)
+        i -= 1
+
+    if pending:
+        page.append(_merge(pending[::-1]))
 
-    return result
+    return page[::-1], (i if i > 0 else None)
@@ -0,0 +1,30 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+from bson import ObjectId
+
+
+def encode_cursor(sort_value: datetime, id: ObjectId) -> str:
+    payload = json.dumps({'t': sort_value.isoformat(), 'id': str(id)})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Raises ValueError for malformed cursors."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(payload['t']), ObjectId(payload['id'])
+    except Exception as e:
+        raise ValueError('Invalid cursor') from e
+
+def keyset_filter(field: str, cursor: Optional[str]) -> dict:
+    """Filter for the page after `cursor` when sorting by (field, _id) descending."""
+    if not cursor:
+        return {}
+    sort_value, id = decode_cursor(cursor)
+    return {
+        '$or': [
+            {field: {'$lt': sort_value}},
+            {field: sort_value, '_id': {'$lt': id}},
+        ]
+    }
@@ -0,0 +1,38 @@
+from typing import Callable, Hashable, List, Sequence, TypeVar
+
+T = TypeVar('T')
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[T]],
+    key: Callable[[T], Hashable],
+    k: int = 60,
+) -> List[T]:
+    scores = {}
+    items = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking):
+            item_key = key(item)
+            scores[item_key] = scores.get(item_key, 0.0) + 1 / (k + rank + 1)
+            items.setdefault(item_key, item)
+    return [items[item_key] for item_key in sorted(scores, key=scores.get, reverse=True)]
+
+def maximal_marginal_relevance(
+    ranking: Sequence[T],
+    similarity: Callable[[T, T], float],
+    k: int,
+    lambda_mult: float = 0.7,
+) -> List[T]:
+    """Pick `k` items from a ranking, trading each item's rank against its
+    similarity to the items already picked."""
+    relevance = [1 - rank / len(ranking) for rank in range(len(ranking))]
+    redundancy = [0.0] * len(ranking)
+    remaining = list(range(len(ranking)))
+    selected = []
+    while remaining and len(selected) < k:
+        best = max(remaining, key=lambda i: lambda_mult * relevance[i] - (1 - lambda_mult) * redundancy[i])
+        remaining.remove(best)
+        selected.append(ranking[best])
+        for i in remaining:
+            redundancy[i] = max(redundancy[i], similarity(ranking[i], ranking[best]))
+    return selected
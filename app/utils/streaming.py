@@ -0,0 +1,137 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, List, NamedTuple, Optional
+
+
+class StreamEvent(NamedTuple):
+    kind: str
+    data: Any
+
+
+class _Failure(NamedTuple):
+    error: BaseException
+
+_end = object()
+
+
+async def coalesce_tokens(
+    events: AsyncIterator[StreamEvent],
+    max_delay: float = 0.05,
+    max_chars: int = 512,
+    max_pending: int = 256,
+) -> AsyncIterator[StreamEvent]:
+    """Merge consecutive token events into larger ones.
+
+    Buffered tokens are flushed once `max_chars` accumulate, `max_delay`
+    seconds after the first buffered token, or before any other event.
+    The source is drained into a queue of at most `max_pending` events by
+    a separate task, so a slow client pauses the source instead of
+    growing memory. Closing or cancelling this generator cancels the
+    source.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(max_pending)
+
+    async def produce():
+        try:
+            async for event in events:
+                await queue.put(event)
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            await queue.put(_Failure(e))
+        else:
+            await queue.put(_end)
+        finally:
+            await events.aclose()
+
+    producer = asyncio.create_task(produce())
+    buffer = []
+    size = 0
+    deadline = 0.0
+
+    def flush() -> StreamEvent:
+        nonlocal buffer, size
+        event = StreamEvent('token', ''.join(buffer))
+        buffer, size = [], 0
+        return event
+
+    try:
+        while True:
+            timeout = max(0.0, deadline - loop.time()) if buffer else None
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield flush()
+                continue
+
+            if event is _end:
+                break
+            if isinstance(event, _Failure):
+                if buffer:
+                    yield flush()
+                raise event.error
+
+            if event.kind == 'token':
+                if not buffer:
+                    deadline = loop.time() + max_delay
+                buffer.append(event.data)
+                size += len(event.data)
+                if size >= max_chars:
+                    yield flush()
+                continue
+
+            if buffer:
+                yield flush()
+            yield event
+
+        if buffer:
+            yield flush()
+    finally:
+        producer.cancel()
+
+async def to_text(events: AsyncIterator[StreamEvent]) -> AsyncIterator[str]:
+    try:
+        async for event in events:
+            if event.kind == 'token':
+                yield event.data
+    finally:
+        await events.aclose()
+
+async def to_sse(events: AsyncIterator[StreamEvent]) -> AsyncIterator[str]:
+    try:
+        async for event in events:
+            data = {'text': event.data} if event.kind == 'token' else event.data
+            yield f'event: {event.kind}\ndata: {json.dumps(data)}\n\n'
+    finally:
+        await events.aclose()
+
+async def aiter_lines(chunks: AsyncIterator[bytes], max_line_size: int = 1024 * 1024) -> AsyncIterator[Optional[bytes]]:
+    """Split a byte stream into lines without buffering more than one partial line.
+
+    Only newly received bytes are scanned for newlines. A line longer than
+    `max_line_size` bytes is discarded as it arrives and yielded as None,
+    so the caller can count it as invalid.
+    """
+    pending: List[bytes] = []
+    size = 0
+    oversized = False
+    async for chunk in chunks:
+        *lines, rest = chunk.split(b'\n')
+        for line in lines:
+            if oversized or size + len(line) > max_line_size:
+                yield None
+            else:
+                yield b''.join(pending) + line if pending else line
+            pending, size, oversized = [], 0, False
+        if oversized or not rest:
+            continue
+        size += len(rest)
+        if size > max_line_size:
+            pending, oversized = [], True
+        else:
+            pending.append(rest)
+    if oversized:
+        yield None
+    elif pending:
+        yield b''.join(pending)
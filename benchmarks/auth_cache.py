@@ -0,0 +1,66 @@
+"""p50/p99 latency of an authenticated no-op endpoint with and without the user cache.
+
+Creates a throwaway user in the configured MongoDB:
+
+    python -m benchmarks.auth_cache --requests 5000 --concurrency 100
+"""
+import argparse
+import asyncio
+import time
+import httpx
+from fastapi import Depends, FastAPI
+from app.core.database import users_collection
+from app.dependencies import auth
+from app.utils.cache import TTLCache
+from app.utils.jwt import create_access_token
+
+app = FastAPI()
+
+@app.get('/noop')
+async def noop(current_user: dict=Depends(auth.get_current_user)):
+    return {}
+
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000
+
+async def run(name: str, token: str, total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    headers = {'Authorization': f'Bearer {token}'}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get('/noop', headers=headers)
+                response.raise_for_status()
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+
+    print(
+        f'{name:>9}: p50={percentile(latencies, 0.5):.2f}ms p99={percentile(latencies, 0.99):.2f}ms '
+        f'{total / elapsed:.0f} req/s'
+    )
+
+async def main(total: int, concurrency: int):
+    result = await users_collection.insert_one({'email': 'bench-auth-cache@example.com', 'hashed_password': ''})
+    token = create_access_token({'sub': str(result.inserted_id)})
+    try:
+        cached_users, cached_tokens = auth.user_cache, auth.token_cache
+        auth.user_cache, auth.token_cache = TTLCache(0), TTLCache(0)
+        await run('uncached', token, total, concurrency)
+        auth.user_cache, auth.token_cache = cached_users, cached_tokens
+        await run('cached', token, total, concurrency)
+    finally:
+        await users_collection.delete_one({'_id': result.inserted_id})
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,86 @@
+"""Import 10k notes through POST /notes/import vs. one POST /notes + /embed per note.
+
+Runs the full app in-process against the configured MongoDB and
+embedding model. The per-note path is timed on a sample and
+extrapolated:
+
+    python -m benchmarks.bulk_import --notes 10000 --sample 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import httpx
+from app.core.database import notes_collection, users_collection
+from app.groq_app import app
+
+EMAIL = 'bench-bulk-import@example.com'
+PASSWORD = 'bench-password'
+WORDS = 'project meeting budget design review release customer schema index latency notes'.split()
+
+
+def make_note(rng: random.Random, i: int) -> dict:
+    paragraphs = ['. '.join(' '.join(rng.choices(WORDS, k=12)) for _ in range(6)) for _ in range(rng.randint(1, 6))]
+    return {'title': f'Note {i}', 'content': '\n\n'.join(paragraphs)}
+
+async def ndjson(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield (json.dumps(make_note(rng, i)) + '\n').encode('utf-8')
+
+async def authenticate(client: httpx.AsyncClient) -> dict:
+    await client.post('/sign-up', json={'email': EMAIL, 'password': PASSWORD})
+    response = await client.post('/sign-in', json={'email': EMAIL, 'password': PASSWORD})
+    return {'Authorization': f'Bearer {response.json()["access_token"]}'}
+
+async def per_note(client: httpx.AsyncClient, headers: dict, count: int) -> float:
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for i in range(count):
+        note = make_note(rng, i)
+        response = await client.post('/notes', json=note, headers=headers)
+        note_id = response.json()['id']
+        response = await client.post(f'/notes/{note_id}/embed', json=note, headers=headers)
+        job_id = response.json()['job_id']
+        while (await client.get(f'/embeddings/jobs/{job_id}', headers=headers)).json()['status'] in ('queued', 'running'):
+            await asyncio.sleep(0.01)
+    return time.perf_counter() - start
+
+async def bulk(client: httpx.AsyncClient, headers: dict, count: int):
+    start = time.perf_counter()
+    response = await client.post('/notes/import', content=ndjson(count), headers=headers)
+    job = response.json()
+    uploaded = time.perf_counter() - start
+    while job['status'] == 'embedding':
+        await asyncio.sleep(0.25)
+        job = (await client.get(f'/notes/import/{job["id"]}', headers=headers)).json()
+        print(f'  embedded {job["embedded"]}/{job["inserted"]}', end='\r')
+    print()
+    return uploaded, time.perf_counter() - start, job
+
+async def main(count: int, sample: int):
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+            headers = await authenticate(client)
+            user = await users_collection.find_one({'email': EMAIL})
+            try:
+                elapsed = await per_note(client, headers, sample)
+                print(f'per-note: {sample / elapsed:.1f} notes/s, ~{elapsed / sample * count:.0f}s for {count} notes')
+
+                uploaded, total, job = await bulk(client, headers, count)
+                print(
+                    f'    bulk: inserted {job["inserted"]} in {uploaded:.1f}s, '
+                    f'embedded {job["embedded"]} by {total:.1f}s ({count / total:.1f} notes/s)'
+                )
+            finally:
+                await notes_collection.delete_many({'user_id': str(user['_id'])})
+                await users_collection.delete_one({'_id': user['_id']})
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--notes', type=int, default=10000)
+    parser.add_argument('--sample', type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.notes, args.sample))
@@ -0,0 +1,72 @@
+"""Response time and memory of GET /chats: full listing vs. first keyset page.
+
+Seeds chats for a throwaway user in the configured MongoDB and removes
+them afterwards:
+
+    python -m benchmarks.chat_listing --counts 1000 10000 50000
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import List
+from pydantic import TypeAdapter
+from app.core.database import chats_collection
+from app.core.indexes import ensure_indexes
+from app.models.chat import ChatModel
+from app.models.chat_page import ChatPageModel
+
+USER_ID = 'bench-chat-listing'
+
+
+async def seed(count: int):
+    await chats_collection.delete_many({'user_id': USER_ID})
+    now = datetime.now(timezone.utc)
+    docs = [
+        {'user_id': USER_ID, 'title': f'Chat {i}', 'messages': [], 'updated_at': now - timedelta(seconds=i)}
+        for i in range(count)
+    ]
+    for i in range(0, count, 5000):
+        await chats_collection.insert_many(docs[i:i + 5000])
+
+async def full_listing():
+    chats = await chats_collection.find({'user_id': USER_ID}, {'messages': 0}).to_list(None)
+    for chat in chats:
+        chat['_id'] = str(chat['_id'])
+    return TypeAdapter(List[ChatModel]).dump_json(TypeAdapter(List[ChatModel]).validate_python(chats))
+
+async def first_page(limit: int):
+    chats = await chats_collection.find(
+        {'user_id': USER_ID},
+        {'title': 1, 'updated_at': 1},
+    ).sort([('updated_at', -1), ('_id', -1)]).limit(limit + 1).to_list(limit + 1)
+    return ChatPageModel(chats=chats[:limit]).model_dump_json()
+
+async def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    await fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 1024 / 1024
+
+async def main(counts, limit: int):
+    await ensure_indexes()
+    print(f'{"chats":>7} {"full":>20} {"keyset page":>20}')
+    try:
+        for count in counts:
+            await seed(count)
+            full = await measure(full_listing)
+            page = await measure(lambda: first_page(limit))
+            print(f'{count:>7} {full[0]:>9.1f}ms {full[1]:>6.1f}MiB {page[0]:>9.1f}ms {page[1]:>6.1f}MiB')
+    finally:
+        await chats_collection.delete_many({'user_id': USER_ID})
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--counts', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--limit', type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.counts, args.limit))
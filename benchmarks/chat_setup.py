@@ -0,0 +1,89 @@
+"""Per-turn setup cost: a fresh saver and graph per turn vs. the shared runtime.
+
+Runs against the MongoDB configured in `.env`:
+
+    python -m benchmarks.chat_setup --turns 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from app.agent_graph import AgentGraph
+from app.core.agent_runtime import AgentRuntime
+from app.core.chat_saver import ChatSaver
+from app.core.database import db, db_client
+from app.tools.notes import NotesTool
+
+
+class FakeLLM(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def make_llm():
+    return FakeLLM(messages=iter(()))
+
+async def open_connections() -> int | None:
+    try:
+        status = await db.command('serverStatus')
+    except Exception:
+        return None
+    return status['connections']['current']
+
+async def legacy_turn(thread_id: str) -> float:
+    start = time.perf_counter()
+    tools = [NotesTool(vectorstore=None)]
+    llm_with_tools = make_llm().bind_tools(tools=tools)
+    async with ChatSaver.create() as memory:
+        AgentGraph.create_graph(llm_with_tools, tools, memory)
+        await memory.aget(AgentRuntime.config(thread_id))
+        return time.perf_counter() - start
+
+async def shared_turn(runtime: AgentRuntime, thread_id: str) -> float:
+    start = time.perf_counter()
+    await runtime.memory.aget(runtime.config(thread_id))
+    return time.perf_counter() - start
+
+async def run(name: str, turn, turns: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    peak = 0
+    done = asyncio.Event()
+
+    async def sample():
+        nonlocal peak
+        while not done.is_set():
+            peak = max(peak, await open_connections() or 0)
+            await asyncio.sleep(0.05)
+
+    async def bounded(i: int):
+        async with semaphore:
+            return await turn(f'bench-{i}')
+
+    sampler = asyncio.create_task(sample())
+    latencies = await asyncio.gather(*(bounded(i) for i in range(turns)))
+    done.set()
+    await sampler
+
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f'{name:>8}: p50={statistics.median(latencies) * 1000:.1f}ms '
+        f'p99={p99 * 1000:.1f}ms peak_connections={peak or "n/a"}'
+    )
+
+async def main(turns: int, concurrency: int):
+    baseline = await open_connections()
+    print(f'baseline connections: {baseline if baseline is not None else "n/a"}')
+
+    await run('legacy', legacy_turn, turns, concurrency)
+
+    runtime = AgentRuntime(make_llm(), [NotesTool(vectorstore=None)], ChatSaver.from_client(db_client))
+    await run('shared', lambda thread_id: shared_turn(runtime, thread_id), turns, concurrency)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--turns', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.concurrency))
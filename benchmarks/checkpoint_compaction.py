@@ -0,0 +1,84 @@
+"""Checkpoint storage per chat before and after compaction.
+
+Appends `--turns` user/assistant exchanges to `--threads` chats through
+the real MongoDB saver, then compacts them to the latest `--keep`
+checkpoints. Runs against the MongoDB configured in `.env`:
+
+    python -m benchmarks.checkpoint_compaction --threads 20 --turns 50 --keep 3
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from app.agent_graph import AgentGraph
+from app.core.agent_runtime import AgentRuntime
+from app.core.chat_saver import ChatSaver
+from app.core.checkpoint_compaction import CheckpointCompactor
+from app.core.database import chats_cp_collection, chats_cp_writes_collection, db_client
+
+
+class FakeLLM(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+async def usage(thread_ids) -> tuple:
+    query = {'thread_id': {'$in': thread_ids}}
+    documents = 0
+    size = 0
+    for collection in (chats_cp_collection, chats_cp_writes_collection):
+        result = await collection.aggregate([
+            {'$match': query},
+            {'$group': {'_id': None, 'count': {'$sum': 1}, 'bytes': {'$sum': {'$bsonSize': '$$ROOT'}}}},
+        ]).to_list(1)
+        if result:
+            documents += result[0]['count']
+            size += result[0]['bytes']
+    return documents, size
+
+async def main(threads: int, turns: int, keep: int):
+    memory = ChatSaver.from_client(db_client)
+    graph = AgentGraph.create_graph(FakeLLM(messages=iter(())), [], memory)
+    thread_ids = [f'bench-compaction-{uuid.uuid4().hex}' for _ in range(threads)]
+    compactor = CheckpointCompactor(chats_cp_collection, chats_cp_writes_collection, keep=keep)
+
+    try:
+        for thread_id in thread_ids:
+            for turn in range(turns):
+                await graph.aupdate_state(
+                    AgentRuntime.config(thread_id),
+                    {'messages': [HumanMessage(f'question {turn} ' * 20), AIMessage(f'answer {turn} ' * 60)]},
+                    as_node='chatbot',
+                )
+
+        documents, size = await usage(thread_ids)
+        print(f'before: {documents} documents, {size / 1024:.0f} KiB ({size / threads / 1024:.0f} KiB per chat)')
+
+        start = time.perf_counter()
+        for thread_id in thread_ids:
+            await compactor.compact_thread(thread_id)
+        elapsed = time.perf_counter() - start
+
+        documents, size = await usage(thread_ids)
+        stats = compactor.stats()['compacted']
+        print(f' after: {documents} documents, {size / 1024:.0f} KiB ({size / threads / 1024:.0f} KiB per chat)')
+        print(
+            f'reclaimed {stats["checkpoints"]} checkpoints, {stats["writes"]} writes, '
+            f'{stats["bytes"] / 1024:.0f} KiB in {elapsed * 1000:.0f} ms'
+        )
+
+        messages = (await memory.aget(AgentRuntime.config(thread_ids[0])))['channel_values']['messages']
+        assert len(messages) == 2 * turns, 'compaction lost history'
+    finally:
+        for thread_id in thread_ids:
+            await compactor.delete_thread(thread_id)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=20)
+    parser.add_argument('--turns', type=int, default=50)
+    parser.add_argument('--keep', type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.threads, args.turns, args.keep))
@@ -0,0 +1,106 @@
+"""Chunking throughput, chunk count and recall@k: character splitter on
+the note's JSON vs. the token-aware markdown chunker.
+
+Builds synthetic markdown notes where each section records one fact
+(a person and the invoice they approved) among filler paragraphs, lists
+and code, then asks for each fact and checks whether a top-k chunk
+contains the invoice code:
+
+    python -m benchmarks.chunking --notes 200
+    python -m benchmarks.chunking --notes 200 --offline   # hashed embeddings, ~4 chars/token
+"""
+import argparse
+import json
+import random
+import time
+import numpy as np
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.core.chunking import MarkdownChunker, approximate_tokens, load_token_counter
+from app.core.settings import settings
+
+TOPICS = ['budget review', 'vendor onboarding', 'sprint retrospective', 'hiring plan', 'incident report']
+NAMES = ['Okonkwo', 'Haraldsen', 'Villanueva', 'Tanaka', 'Moreau', 'Kowalczyk', 'Abernathy', 'Lindqvist']
+FILLER = (
+    'The team walked through the open items and agreed on owners. Several follow-ups were deferred '
+    'to the next meeting because the numbers were not final. Everyone should review the shared '
+    'document before Friday and leave comments inline.'
+)
+
+
+def make_corpus(count: int, sections: int, seed: int = 0):
+    rng = random.Random(seed)
+    notes, facts = [], []
+    for i in range(count):
+        topic = rng.choice(TOPICS)
+        parts = [f'# {topic.title()} {i}', FILLER]
+        for j in range(sections):
+            name = f'{rng.choice(NAMES)}{i}x{j}'
+            code = f'INV-{rng.randint(10000, 99999)}'
+            parts += [
+                f'## {name}',
+                ' '.join([FILLER] * rng.randint(1, 3)),
+                f'{name} approved invoice {code} for the {topic}.',
+                '- confirm totals\n- notify finance\n- archive the thread',
+                '```\nstatus: approved\nowner: finance\n```',
+            ]
+            facts.append((code, f'Which invoice did {name} approve for the {topic}?'))
+        notes.append({'user_id': 'bench-user', 'title': f'{topic.title()} {i}', 'content': '\n\n'.join(parts)})
+    return notes, facts
+
+def old_chunks(notes):
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1024, chunk_overlap=0, keep_separator='end')
+    return [chunk for note in notes for chunk in splitter.split_text(json.dumps(note))]
+
+def new_chunks(notes, chunker: MarkdownChunker):
+    return [chunk for note in notes for chunk in chunker.split_text(f'# {note["title"]}\n\n{note["content"]}')]
+
+def timed(split, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        chunks = split()
+    return chunks, (time.perf_counter() - start) / repeat
+
+def recall(embeddings, chunks, facts, k: int) -> float:
+    vectors = np.asarray(embeddings.embed_documents(chunks), dtype=np.float32)
+    queries = np.asarray(embeddings.embed_documents([query for _, query in facts]), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True) + 1e-12
+    top = np.argsort(-(queries @ vectors.T), axis=1)[:, :k]
+    hits = sum(any(code in chunks[i] for i in row) for (code, _), row in zip(facts, top))
+    return hits / len(facts)
+
+def main(args):
+    if args.offline:
+        from benchmarks.offline import FakeEmbeddings
+        count_tokens, embeddings = approximate_tokens, FakeEmbeddings()
+    else:
+        from app.core.embedding_backends import load_embeddings
+        count_tokens = load_token_counter(settings.chunk_tokenizer or settings.embedding_model)
+        embeddings = load_embeddings(settings.embedding_model, settings.embedding_backend)
+
+    notes, facts = make_corpus(args.notes, args.sections)
+    chunker = MarkdownChunker(count_tokens, max_tokens=args.max_tokens, overlap_tokens=args.overlap_tokens)
+    size = sum(len(note['content']) for note in notes) / 1e6
+    rows = [
+        ('json + 1024 chars', *timed(lambda: old_chunks(notes), args.repeat)),
+        (f'markdown {args.max_tokens} tok', *timed(lambda: new_chunks(notes, chunker), args.repeat)),
+    ]
+    print(f'{"splitter":<20} {"MB/s":>7} {"chunks":>7} {"tokens":>8} {"max tok":>8} {f"recall@{args.k}":>9}')
+    for name, chunks, seconds in rows:
+        tokens = [count_tokens(chunk) for chunk in chunks]
+        print(
+            f'{name:<20} {size / seconds:>7.2f} {len(chunks):>7} {sum(tokens):>8} {max(tokens):>8} '
+            f'{recall(embeddings, chunks, facts, args.k):>9.2%}'
+        )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--notes', type=int, default=200)
+    parser.add_argument('--sections', type=int, default=4)
+    parser.add_argument('--max-tokens', type=int, default=settings.chunk_max_tokens)
+    parser.add_argument('--overlap-tokens', type=int, default=settings.chunk_overlap_tokens)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('-k', type=int, default=5)
+    parser.add_argument('--offline', action='store_true')
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,59 @@
+"""Prompt size and per-turn latency over long threads, with a fake LLM.
+
+    python -m benchmarks.context_growth --turns 500
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.checkpoint.memory import MemorySaver
+from app.agent_graph import AgentGraph
+from app.core.context_window import ContextPolicy, estimate_tokens
+from app.tools.notes import NotesTool
+
+
+class FakeLLM(BaseChatModel):
+    reply_words: int = 80
+    prompt_tokens: List[int] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return 'fake'
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.prompt_tokens.append(sum(estimate_tokens(message) for message in messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage('word ' * self.reply_words))])
+
+async def run(name: str, context: ContextPolicy, turns: int):
+    llm = FakeLLM(prompt_tokens=[])
+    graph = AgentGraph.create_graph(llm, [NotesTool(vectorstore=None)], MemorySaver(), context, summary_llm=llm)
+    config = {'configurable': {'thread_id': name}}
+
+    timings = []
+    for turn in range(turns):
+        start = time.perf_counter()
+        await graph.ainvoke({'messages': [('user', f'question {turn} ' + 'detail ' * 40)]}, config)
+        timings.append(time.perf_counter() - start)
+
+    chat_prompts = llm.prompt_tokens
+    print(
+        f'{name:>10}: last_prompt={chat_prompts[-1]:>7} tokens '
+        f'total_prompt={sum(chat_prompts):>10} tokens '
+        f'first_turn={timings[0] * 1000:.1f}ms last_turn={timings[-1] * 1000:.1f}ms '
+        f'llm_calls={len(chat_prompts)}'
+    )
+
+async def main(turns: int, max_tokens: int):
+    await run('unbounded', ContextPolicy(max_tokens=10 ** 9), turns)
+    await run('window', ContextPolicy(max_tokens=max_tokens), turns)
+    await run('summary', ContextPolicy(max_tokens=max_tokens, summarize=True), turns)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--turns', type=int, default=500)
+    parser.add_argument('--max-tokens', type=int, default=6000)
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.max_tokens))
@@ -0,0 +1,116 @@
+"""Encode throughput, query latency, RSS and recall@5 per embedding backend.
+
+Each backend runs in a fresh process so RSS is not shared. Recall@5 is
+the overlap of each backend's top 5 chunks per query with those of
+full-precision torch at full dimension:
+
+    python -m benchmarks.embedding_backends --chunks 1000 \\
+        --backends torch torch-int8 onnx --dimensions 0 256
+"""
+import argparse
+import json
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import numpy as np
+
+TOPICS = [
+    'quarterly budget review and vendor costs',
+    'hiring plan for the platform team',
+    'incident report for the payment outage',
+    'release checklist and rollout steps',
+    'customer interview notes about onboarding',
+    'database schema migration and index changes',
+    'sprint retrospective action items',
+    'travel plans for the offsite',
+]
+WORDS = 'meeting agenda deadline owner follow up draft summary decision risk estimate blocker'.split()
+
+
+def make_corpus(chunk_count: int, query_count: int, seed: int = 0):
+    rng = random.Random(seed)
+    texts = [
+        f'{rng.choice(TOPICS)}. ' + ' '.join(rng.choices(WORDS, k=rng.randint(40, 120)))
+        for _ in range(chunk_count)
+    ]
+    queries = [f'{rng.choice(TOPICS).split(" and ")[0]} {rng.choice(WORDS)}' for _ in range(query_count)]
+    return texts, queries
+
+def worker(args):
+    from app.core.embedding_backends import load_embeddings
+
+    texts, queries = make_corpus(args.chunks, args.queries)
+    start = time.perf_counter()
+    embeddings = load_embeddings(args.model, args.backend, dimensions=args.dimension or None, onnx_file=args.onnx_file)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    documents = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    encode_seconds = time.perf_counter() - start
+
+    timings, top = [], []
+    for query in queries:
+        start = time.perf_counter()
+        vector = np.asarray(embeddings.embed_query(query), dtype=np.float32)
+        timings.append(time.perf_counter() - start)
+        top.append(np.argsort(-(documents @ vector))[:5].tolist())
+
+    json.dump({
+        'load_seconds': load_seconds,
+        'chunks_per_second': len(texts) / encode_seconds,
+        'query_ms': statistics.median(timings) * 1000,
+        'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'dimension': int(documents.shape[1]),
+        'top': top,
+    }, sys.stdout)
+
+def run(args, backend: str, dimension: int) -> dict:
+    command = [
+        sys.executable, '-m', 'benchmarks.embedding_backends', '--worker',
+        '--model', args.model, '--backend', backend, '--dimension', str(dimension),
+        '--chunks', str(args.chunks), '--queries', str(args.queries),
+    ]
+    if args.onnx_file:
+        command += ['--onnx-file', args.onnx_file]
+    output = subprocess.run(command, check=True, capture_output=True, text=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def main(args):
+    reference = run(args, 'torch', 0)
+    print(f'{"backend":>11}{"dim":>6}{"load s":>8}{"chunks/s":>10}{"query ms":>10}{"RSS MB":>9}{"recall@5":>10}')
+    for backend in args.backends:
+        for dimension in args.dimensions:
+            try:
+                result = reference if (backend, dimension) == ('torch', 0) else run(args, backend, dimension)
+            except subprocess.CalledProcessError as e:
+                print(f'{backend:>11}{dimension or "full":>6}  failed: {e.stderr.strip().splitlines()[-1]}')
+                continue
+            recall = statistics.mean(
+                len(set(top) & set(expected)) / 5
+                for top, expected in zip(result['top'], reference['top'])
+            )
+            print(
+                f'{backend:>11}{result["dimension"]:>6}{result["load_seconds"]:>8.1f}'
+                f'{result["chunks_per_second"]:>10.1f}{result["query_ms"]:>10.1f}'
+                f'{result["rss_mb"]:>9.0f}{recall:>10.2f}'
+            )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', default='nomic-ai/nomic-embed-text-v2-moe')
+    parser.add_argument('--backends', nargs='+', default=['torch', 'torch-int8', 'onnx'])
+    parser.add_argument('--dimensions', nargs='+', type=int, default=[0, 256], help='0 keeps the full dimension')
+    parser.add_argument('--onnx-file', default=None)
+    parser.add_argument('--chunks', type=int, default=1000)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--worker', action='store_true')
+    parser.add_argument('--backend', default='torch')
+    parser.add_argument('--dimension', type=int, default=0)
+    args = parser.parse_args()
+    if args.worker:
+        worker(args)
+    else:
+        main(args)
@@ -0,0 +1,62 @@
+"""Encode throughput in chunks/sec: one call per note vs. coalesced batches.
+
+    python -m benchmarks.embedding_throughput --notes 200 --batch-size 64
+"""
+import argparse
+import random
+import time
+from langchain_huggingface import HuggingFaceEmbeddings
+
+WORDS = (
+    'meeting agenda budget review deadline project design api schema index '
+    'query latency summary action owner follow up draft release notes'
+).split()
+
+
+def make_notes(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    notes = []
+    for _ in range(count):
+        chunk_count = rng.choice((1, 1, 1, 2, 2, 3, 4))
+        notes.append([
+            ' '.join(rng.choices(WORDS, k=rng.randint(60, 180)))
+            for _ in range(chunk_count)
+        ])
+    return notes
+
+def per_note(embeddings, notes):
+    for chunks in notes:
+        embeddings.embed_documents(chunks)
+
+def batched(embeddings, notes, batch_size: int):
+    texts = [chunk for chunks in notes for chunk in chunks]
+    for i in range(0, len(texts), batch_size):
+        embeddings.embed_documents(texts[i:i + batch_size])
+
+def measure(name: str, fn, chunk_count: int):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f'{name:>9}: {chunk_count / elapsed:8.1f} chunks/sec ({elapsed:.2f}s)')
+
+def main(model: str, note_count: int, batch_size: int):
+    embeddings = HuggingFaceEmbeddings(
+        model_name=model,
+        model_kwargs={'trust_remote_code': True},
+        encode_kwargs={'normalize_embeddings': True, 'batch_size': batch_size},
+    )
+    notes = make_notes(note_count)
+    chunk_count = sum(len(chunks) for chunks in notes)
+    print(f'{note_count} notes, {chunk_count} chunks')
+
+    embeddings.embed_documents(notes[0])
+    measure('per-note', lambda: per_note(embeddings, notes), chunk_count)
+    measure('batched', lambda: batched(embeddings, notes, batch_size), chunk_count)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', default='nomic-ai/nomic-embed-text-v2-moe')
+    parser.add_argument('--notes', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=64)
+    args = parser.parse_args()
+    main(args.model, args.notes, args.batch_size)
@@ -0,0 +1,84 @@
+"""Latency and recall@k of dense-only search vs. BM25 + dense fusion.
+
+Builds a synthetic corpus where each note carries an exact identifier
+(invoice code, person, date) and queries for those identifiers:
+
+    python -m benchmarks.hybrid_search --notes 500
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import chromadb
+from langchain_huggingface import HuggingFaceEmbeddings
+from app.core.components import LazyComponent
+from app.core.lexical_index import LexicalIndex
+from app.core.vector_store import create_vectorstore
+from app.tools.notes import NotesTool
+
+USER_ID = 'bench-user'
+TOPICS = ['budget review', 'vendor onboarding', 'sprint retrospective', 'hiring plan', 'incident report']
+NAMES = ['Okonkwo', 'Haraldsen', 'Villanueva', 'Tanaka', 'Moreau', 'Kowalczyk', 'Abernathy', 'Lindqvist']
+
+
+def make_corpus(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    notes, queries = [], []
+    for i in range(count):
+        code = f'INV-{rng.randint(10000, 99999)}'
+        name = f'{rng.choice(NAMES)}{i}'
+        date = f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'
+        topic = rng.choice(TOPICS)
+        notes.append(
+            f'Notes from the {topic}. {name} raised invoice {code} on {date}. '
+            f'We agreed to follow up on the {topic} items next week.'
+        )
+        queries.append((str(i), rng.choice([code, name, f'{topic} {date}'])))
+    return notes, queries
+
+async def search(tool: NotesTool, query: str):
+    return (await tool._search_many([query], USER_ID))[0]
+
+async def evaluate(tool: NotesTool, queries, k: int):
+    hits, timings = 0, []
+    for note_id, query in queries:
+        start = time.perf_counter()
+        results = await search(tool, query)
+        timings.append(time.perf_counter() - start)
+        hits += any(doc.metadata['note_id'] == note_id for doc in results[:k])
+    return hits / len(queries), statistics.median(timings) * 1000
+
+async def main(model: str, note_count: int, k: int):
+    embeddings = HuggingFaceEmbeddings(
+        model_name=model,
+        model_kwargs={'trust_remote_code': True},
+        encode_kwargs={'normalize_embeddings': True},
+    )
+    vectorstore = create_vectorstore(chromadb.EphemeralClient(), 'bench', embeddings)
+    notes, queries = make_corpus(note_count)
+    metadatas = [{'note_id': str(i), 'user_id': USER_ID, 'index': 0} for i in range(note_count)]
+    ids = [f'{i}:0' for i in range(note_count)]
+    vectorstore.add_texts(notes, metadatas=metadatas, ids=ids)
+    store = LazyComponent('vectorstore', lambda: vectorstore)
+
+    lexical_index = LexicalIndex()
+    lexical_index.add(ids, notes, metadatas)
+    lexical_index.ready = True
+
+    tools = {
+        'dense': NotesTool(vectorstore=store, k=k),
+        'hybrid': NotesTool(vectorstore=store, k=k, lexical_index=lexical_index),
+        'hybrid-nofast': NotesTool(vectorstore=store, k=k, lexical_index=lexical_index, fast_path_max_terms=0),
+    }
+    for name, tool in tools.items():
+        recall, p50 = await evaluate(tool, queries, k)
+        print(f'{name:>14}: recall@{k}={recall:.3f} p50={p50:.2f}ms')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', default='nomic-ai/nomic-embed-text-v2-moe')
+    parser.add_argument('--notes', type=int, default=500)
+    parser.add_argument('--k', type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.model, args.notes, args.k))
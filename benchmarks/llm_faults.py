@@ -0,0 +1,156 @@
+"""Chat success rate and latency under injected provider faults.
+
+A fake remote provider rejects requests with 429 above `--capacity`
+concurrent streams, fails a further `--error-rate` of them before the
+first token and stalls `--hang-rate` of them. A burst of `--requests`
+concurrent chats is then sent three ways:
+  - direct:   straight to the provider, as before the gateway
+  - gateway:  concurrency limit, optional `--rate` token bucket, jittered
+              retries and time-to-first-token timeout
+  - fallback: the same, falling back to a slower but healthy local provider
+
+    python -m benchmarks.llm_faults --requests 200 --capacity 20 --error-rate 0.1 --hang-rate 0.05
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, AsyncIterator, List, Optional
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun
+from langchain_core.messages import AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGenerationChunk
+from pydantic import PrivateAttr
+from app.core.llm_gateway import LLMGateway, Provider, TokenBucket
+from benchmarks.offline import FakeChatModel
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class ProviderError(Exception):
+    status_code = 503
+
+
+class FaultyChatModel(FakeChatModel):
+    """FakeChatModel streaming on the event loop, with injected faults."""
+
+    capacity: Optional[int] = None
+    error_rate: float = 0.0
+    hang_rate: float = 0.0
+    hang_seconds: float = 60.0
+    tool_calls: bool = False
+    seed: int = 0
+
+    _in_flight: int = PrivateAttr(default=0)
+    _rng: random.Random = PrivateAttr(default=None)
+
+    def model_post_init(self, context: Any):
+        self._rng = random.Random(self.seed)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop=None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if self.capacity is not None and self._in_flight >= self.capacity:
+            raise RateLimited('too many requests')
+        self._in_flight += 1
+        try:
+            roll = self._rng.random()
+            await asyncio.sleep(self.first_token_delay)
+            if roll < self.error_rate:
+                raise ProviderError('service unavailable')
+            if roll < self.error_rate + self.hang_rate:
+                await asyncio.sleep(self.hang_seconds)
+            for i, word in enumerate(self._words(messages)):
+                if i:
+                    await asyncio.sleep(self.token_delay)
+                chunk = ChatGenerationChunk(message=AIMessageChunk(word))
+                if run_manager:
+                    await run_manager.on_llm_new_token(word, chunk=chunk)
+                yield chunk
+        finally:
+            self._in_flight -= 1
+
+async def chat(model, index: int):
+    started = time.perf_counter()
+    first_token = None
+    try:
+        async for _ in model.astream([HumanMessage(f'question {index} about the budget review')]):
+            first_token = first_token or time.perf_counter() - started
+        return True, first_token, time.perf_counter() - started
+    except Exception:
+        return False, None, time.perf_counter() - started
+
+def percentile(values, q: float) -> float:
+    return sorted(values)[max(0, int(len(values) * q) - 1)] * 1000 if values else float('nan')
+
+async def run(name: str, model, args):
+    results = await asyncio.gather(*(chat(model, i) for i in range(args.requests)))
+    ok = [result for result in results if result[0]]
+    ttft = [first_token for _, first_token, _ in ok if first_token is not None]
+    total = [elapsed for *_, elapsed in ok]
+    line = (
+        f'{name:<9} {len(ok) / len(results):>8.1%} {percentile(ttft, 0.5):>9.0f} {percentile(ttft, 0.95):>9.0f} '
+        f'{percentile(total, 0.5):>9.0f} {percentile(total, 0.95):>9.0f}'
+    )
+    if isinstance(model, LLMGateway):
+        providers = model.stats()['providers']
+        line += '   ' + ', '.join(
+            f'{provider}: {stats["retries"]} retries, {stats["timeouts"]} timeouts, {stats["fallbacks"]} fallbacks'
+            for provider, stats in providers.items()
+        )
+    print(line)
+
+def remote(args) -> FaultyChatModel:
+    return FaultyChatModel(
+        capacity=args.capacity,
+        error_rate=args.error_rate,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.first_token_timeout * 5,
+        first_token_delay=args.first_token_delay,
+        token_delay=args.token_delay,
+        response_tokens=args.response_tokens,
+    )
+
+def bucket(args) -> Optional[TokenBucket]:
+    return TokenBucket(args.rate) if args.rate else None
+
+def gateway(providers, args) -> LLMGateway:
+    return LLMGateway(
+        providers,
+        max_concurrency=args.capacity,
+        max_retries=args.retries,
+        backoff=args.backoff,
+        first_token_timeout=args.first_token_timeout,
+    )
+
+async def main(args):
+    local = FaultyChatModel(
+        first_token_delay=args.first_token_delay * 3,
+        token_delay=args.token_delay * 3,
+        response_tokens=args.response_tokens,
+    )
+    print(f'{"path":<9} {"success":>8} {"ttft p50":>9} {"ttft p95":>9} {"total p50":>9} {"total p95":>9}')
+    await run('direct', remote(args), args)
+    await run('gateway', gateway([Provider('remote', remote(args), bucket(args))], args), args)
+    await run('fallback', gateway([Provider('remote', remote(args), bucket(args)), Provider('local', local)], args), args)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--capacity', type=int, default=20)
+    parser.add_argument('--error-rate', type=float, default=0.1)
+    parser.add_argument('--hang-rate', type=float, default=0.05)
+    parser.add_argument('--first-token-delay', type=float, default=0.2)
+    parser.add_argument('--token-delay', type=float, default=0.01)
+    parser.add_argument('--response-tokens', type=int, default=60)
+    parser.add_argument('--retries', type=int, default=2)
+    parser.add_argument('--backoff', type=float, default=0.25)
+    parser.add_argument('--first-token-timeout', type=float, default=2.0)
+    parser.add_argument('--rate', type=float, default=0, help='remote requests per second through the gateway; 0 for no limit')
+    args = parser.parse_args()
+    asyncio.run(main(args))
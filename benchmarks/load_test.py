@@ -0,0 +1,231 @@
+"""Offline load test: the full app against in-memory stand-ins.
+
+MongoDB, the checkpointer, the chat model and the embedding model are
+replaced by the fakes in `benchmarks.offline`, so nothing leaves the
+process. Virtual users sign in, then run a weighted mix of note CRUD,
+embedding, chat responses and history reads. Prints throughput and
+p50/p95/p99 per endpoint and writes them to
+`benchmarks/results/load_test-<commit>.json`; pass `--compare` with an
+earlier result file to print the change per endpoint:
+
+    python -m benchmarks.load_test --users 20 --duration 30
+    python -m benchmarks.load_test --compare benchmarks/results/load_test-abc1234.json
+"""
+from benchmarks import offline
+
+offline.install()
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+import httpx
+from app.core.settings import settings
+from app.groq_app import app
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+PASSWORD = 'load-test-password'
+WORDS = 'project meeting budget design review release customer schema index latency notes deadline'.split()
+
+WORKLOAD = {
+    'create_note': 10,
+    'update_note': 5,
+    'embed_note': 10,
+    'list_notes': 5,
+    'list_chats': 10,
+    'create_chat': 3,
+    'respond': 20,
+    'get_chat': 10,
+    'get_messages': 15,
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+def git_commit() -> str:
+    try:
+        output = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], check=True, capture_output=True, text=True)
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return output.stdout.strip()
+
+
+class Recorder():
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+            return None
+        return response
+
+    def summary(self, elapsed: float) -> Dict[str, dict]:
+        endpoints = {}
+        for name in sorted(set(self.latencies) | set(self.errors)):
+            values = self.latencies.get(name) or [0.0]
+            endpoints[name] = {
+                'requests': len(self.latencies.get(name, [])),
+                'errors': self.errors.get(name, 0),
+                'throughput': len(self.latencies.get(name, [])) / elapsed,
+                'p50_ms': percentile(values, 0.50) * 1000,
+                'p95_ms': percentile(values, 0.95) * 1000,
+                'p99_ms': percentile(values, 0.99) * 1000,
+            }
+        return endpoints
+
+
+class VirtualUser():
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, index: int, seed: int):
+        self.client = client
+        self.recorder = recorder
+        self.email = f'load-user-{index}@example.com'
+        self.rng = random.Random(seed * 1000 + index)
+        self.headers: dict = {}
+        self.notes: List[str] = []
+        self.chats: List[str] = []
+
+    def text(self, words: int) -> str:
+        return ' '.join(self.rng.choices(WORDS, k=words))
+
+    def note(self) -> dict:
+        return {'title': self.text(3), 'content': '\n\n'.join(self.text(40) for _ in range(self.rng.randint(1, 4)))}
+
+    async def request(self, name: str, method: str, url: str, **kwargs):
+        return await self.recorder.request(self.client, name, method, url, headers=self.headers, **kwargs)
+
+    async def sign_in(self):
+        await self.recorder.request(self.client, 'sign_up', 'POST', '/sign-up', json={'email': self.email, 'password': PASSWORD})
+        response = await self.recorder.request(self.client, 'sign_in', 'POST', '/sign-in', json={'email': self.email, 'password': PASSWORD})
+        if response is None:
+            raise RuntimeError(f'{self.email} could not sign in')
+        self.headers = {'Authorization': f'Bearer {response.json()["access_token"]}'}
+
+    async def create_note(self):
+        if response := await self.request('create_note', 'POST', '/notes', json=self.note()):
+            self.notes.append(response.json()['id'])
+
+    async def update_note(self):
+        if self.notes:
+            await self.request('update_note', 'PUT', f'/notes/{self.rng.choice(self.notes)}', json=self.note())
+
+    async def embed_note(self):
+        if self.notes:
+            await self.request('embed_note', 'POST', f'/notes/{self.rng.choice(self.notes)}/embed', json=self.note())
+
+    async def list_notes(self):
+        await self.request('list_notes', 'GET', '/notes', params={'limit': 20})
+
+    async def list_chats(self):
+        await self.request('list_chats', 'GET', '/chats', params={'limit': 20})
+
+    async def create_chat(self):
+        if response := await self.request('create_chat', 'POST', '/chats', json={'title': self.text(3)}):
+            self.chats.append(response.json()['id'])
+
+    async def respond(self):
+        if not self.chats:
+            return await self.create_chat()
+        await self.request('respond', 'POST', f'/chats/{self.rng.choice(self.chats)}/respond', json={'message': self.text(8)})
+
+    async def get_chat(self):
+        if self.chats:
+            await self.request('get_chat', 'GET', f'/chats/{self.rng.choice(self.chats)}')
+
+    async def get_messages(self):
+        if self.chats:
+            await self.request('get_messages', 'GET', f'/chats/{self.rng.choice(self.chats)}/messages', params={'limit': 20})
+
+    async def run(self, deadline: float, think_time: float):
+        await self.sign_in()
+        await self.create_note()
+        await self.create_chat()
+        actions, weights = zip(*WORKLOAD.items())
+        while time.perf_counter() < deadline:
+            await getattr(self, self.rng.choices(actions, weights)[0])()
+            if think_time:
+                await asyncio.sleep(self.rng.expovariate(1 / think_time))
+
+
+def print_summary(endpoints: Dict[str, dict], baseline: Optional[Dict[str, dict]] = None):
+    print(f'{"endpoint":<14}{"req":>7}{"err":>6}{"req/s":>9}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}')
+    for name, stats in endpoints.items():
+        line = (
+            f'{name:<14}{stats["requests"]:>7}{stats["errors"]:>6}{stats["throughput"]:>9.1f}'
+            f'{stats["p50_ms"]:>10.1f}{stats["p95_ms"]:>10.1f}{stats["p99_ms"]:>10.1f}'
+        )
+        if baseline and (previous := baseline.get(name)) and previous['p95_ms']:
+            line += f'   p95 {(stats["p95_ms"] / previous["p95_ms"] - 1) * 100:+.0f}%'
+        print(line)
+
+def save(result: dict) -> str:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f'load_test-{result["commit"]}.json')
+    with open(path, 'w') as f:
+        json.dump(result, f, indent=2)
+    return path
+
+async def main(users: int, duration: float, think_time: float, seed: int, compare: Optional[str]):
+    offline.use_fakes()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://load-test', timeout=None) as client:
+            recorder = Recorder()
+            start = time.perf_counter()
+            await asyncio.gather(*(
+                VirtualUser(client, recorder, i, seed).run(start + duration, think_time)
+                for i in range(users)
+            ))
+            elapsed = time.perf_counter() - start
+
+    endpoints = recorder.summary(elapsed)
+    result = {
+        'commit': git_commit(),
+        'created_at': time.time(),
+        'python': platform.python_version(),
+        'parameters': {
+            'users': users,
+            'duration': duration,
+            'think_time': think_time,
+            'seed': seed,
+            'bcrypt_rounds': settings.bcrypt_rounds,
+            'workload': WORKLOAD,
+        },
+        'elapsed': elapsed,
+        'throughput': sum(stats['requests'] for stats in endpoints.values()) / elapsed,
+        'endpoints': endpoints,
+    }
+
+    baseline = None
+    if compare:
+        with open(compare) as f:
+            baseline = json.load(f)['endpoints']
+    print_summary(endpoints, baseline)
+    print(f'total: {result["throughput"]:.1f} req/s over {elapsed:.1f}s, saved to {save(result)}')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--think-time', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--compare', default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.duration, args.think_time, args.seed, args.compare))
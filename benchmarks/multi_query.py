@@ -0,0 +1,95 @@
+"""End-to-end turn latency on multi-topic questions by tool-calling style.
+
+Runs the agent graph offline (fake chat model, hashed embeddings with a
+simulated forward pass, ephemeral Chroma, in-memory checkpoints) and
+asks questions that touch `--topics` topics each, looked up as:
+  - serial:   one query per model turn, as the single-call tool forced
+  - parallel: one tool call per topic in the same model turn
+  - batched:  one tool call carrying every topic
+
+    python -m benchmarks.multi_query --questions 20 --topics 3
+"""
+from benchmarks import offline
+
+offline.install()
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+import chromadb
+from langchain_chroma import Chroma
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from app.core.agent_runtime import AgentRuntime
+from app.core.cached_embeddings import CachedEmbeddings
+from app.core.components import LazyComponent
+from app.core.vector_store import create_vectorstore
+from app.tools.notes import NotesTool
+from app.utils.cache import TTLCache
+
+USER_ID = 'bench-user'
+TOPICS = ['budget review', 'vendor onboarding', 'sprint retrospective', 'hiring plan', 'incident report', 'release checklist']
+
+
+def make_store(notes: int, embed_delay: float, seed: int = 0) -> Chroma:
+    rng = random.Random(seed)
+    embeddings = CachedEmbeddings(offline.FakeEmbeddings(delay=embed_delay), 'fake', TTLCache(1024))
+    store = create_vectorstore(chromadb.EphemeralClient(), 'bench', embeddings)
+    texts = [
+        f'Notes from the {rng.choice(TOPICS)}: ' + ' '.join(rng.choices(' '.join(TOPICS).split(), k=40))
+        for _ in range(notes)
+    ]
+    store.add_texts(
+        texts,
+        metadatas=[{'note_id': str(i), 'user_id': USER_ID, 'index': 0} for i in range(notes)],
+        ids=[f'{i}:0' for i in range(notes)],
+    )
+    return store
+
+async def run(mode: str, store: Chroma, questions, args) -> list:
+    store.embeddings.cache.clear()
+    llm = offline.FakeChatModel(
+        tool_mode=mode,
+        first_token_delay=args.first_token_delay,
+        token_delay=args.token_delay,
+        response_tokens=args.response_tokens,
+    )
+    tool = NotesTool(vectorstore=LazyComponent('vectorstore', lambda: store))
+    runtime = AgentRuntime(llm, [tool], MemorySaver())
+
+    timings = []
+    for question in questions:
+        start = time.perf_counter()
+        await runtime.graph.ainvoke(
+            {'messages': [HumanMessage(question)]},
+            config=runtime.config(uuid.uuid4().hex, USER_ID),
+        )
+        timings.append(time.perf_counter() - start)
+    return timings
+
+async def main(args):
+    rng = random.Random(1)
+    store = make_store(args.notes, args.embed_delay)
+    questions = ['; '.join(rng.sample(TOPICS, args.topics)) for _ in range(args.questions)]
+
+    for mode in ('serial', 'parallel', 'batched'):
+        timings = await run(mode, store, questions, args)
+        print(
+            f'{mode:>8}: p50 {statistics.median(timings) * 1000:.0f} ms, '
+            f'max {max(timings) * 1000:.0f} ms over {len(timings)} turns'
+        )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--questions', type=int, default=20)
+    parser.add_argument('--topics', type=int, default=3)
+    parser.add_argument('--notes', type=int, default=500)
+    parser.add_argument('--embed-delay', type=float, default=0.02)
+    parser.add_argument('--first-token-delay', type=float, default=0.3)
+    parser.add_argument('--token-delay', type=float, default=0.005)
+    parser.add_argument('--response-tokens', type=int, default=40)
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,102 @@
+"""GET /notes paging and GET /notes/search at 100k notes for one user.
+
+Seeds notes for a throwaway user in the configured MongoDB, then times
+the listing and search queries the routes run, next to a `$regex` scan
+for comparison, and reports documents examined from `explain`:
+
+    python -m benchmarks.notes_listing --notes 100000 --searches 50
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from app.core.database import notes_collection
+from app.core.indexes import ensure_indexes
+from app.utils.pagination import encode_cursor, keyset_filter
+
+USER_ID = 'bench-notes-listing'
+WORDS = (
+    'budget review vendor onboarding sprint retrospective hiring plan incident report release '
+    'checklist customer interview schema migration latency index roadmap offsite invoice'
+).split()
+
+
+async def seed(count: int, seed: int = 0):
+    await notes_collection.delete_many({'user_id': USER_ID})
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    for start in range(0, count, 5000):
+        await notes_collection.insert_many([
+            {
+                'user_id': USER_ID,
+                'title': ' '.join(rng.choices(WORDS, k=3)).title(),
+                'content': ' '.join(rng.choices(WORDS, k=rng.randint(50, 300))) + f' ref-{i}',
+                'updated_at': now - timedelta(seconds=i),
+            }
+            for i in range(start, min(count, start + 5000))
+        ])
+
+def listing(cursor=None, limit: int = 50):
+    return notes_collection.find(
+        {'user_id': USER_ID, **keyset_filter('updated_at', cursor)},
+        {'title': 1, 'updated_at': 1},
+    ).sort([('updated_at', -1), ('_id', -1)]).limit(limit + 1)
+
+def text_search(query: str, limit: int = 20):
+    return notes_collection.find(
+        {'user_id': USER_ID, '$text': {'$search': query}},
+        {'title': 1, 'updated_at': 1, 'score': {'$meta': 'textScore'}},
+    ).sort([('score', {'$meta': 'textScore'})]).limit(limit)
+
+def regex_search(query: str, limit: int = 20):
+    return notes_collection.find(
+        {'user_id': USER_ID, '$or': [{'title': {'$regex': query, '$options': 'i'}}, {'content': {'$regex': query, '$options': 'i'}}]},
+        {'title': 1, 'updated_at': 1},
+    ).limit(limit)
+
+async def timed(make_cursor) -> float:
+    start = time.perf_counter()
+    await make_cursor().to_list(None)
+    return (time.perf_counter() - start) * 1000
+
+async def examined(cursor) -> int:
+    plan = await cursor.explain()
+    return plan.get('executionStats', {}).get('totalDocsExamined', -1)
+
+async def main(count: int, searches: int, pages: int):
+    await ensure_indexes()
+    await seed(count)
+    rng = random.Random(1)
+    try:
+        first = [await timed(listing) for _ in range(20)]
+        print(f'first page:      p50 {statistics.median(first):7.1f} ms, examined {await examined(listing())}')
+
+        cursor, deep = None, []
+        for _ in range(pages):
+            start = time.perf_counter()
+            notes = await listing(cursor).to_list(None)
+            deep.append((time.perf_counter() - start) * 1000)
+            cursor = encode_cursor(notes[49]['updated_at'], notes[49]['_id'])
+        print(f'page {pages:<4}       p50 {statistics.median(deep):7.1f} ms, examined {await examined(listing(cursor))}')
+
+        queries = [' '.join(rng.sample(WORDS, 2)) for _ in range(searches)]
+        text = [await timed(lambda: text_search(query)) for query in queries]
+        print(f'text search:     p50 {statistics.median(text):7.1f} ms, examined {await examined(text_search(queries[0]))}')
+
+        terms = [query.split()[0] for query in queries]
+        regex = [await timed(lambda: regex_search(term)) for term in terms[:10]]
+        rare = f'ref-{count - 1}'
+        print(f'regex (common):  p50 {statistics.median(regex):7.1f} ms, examined {await examined(regex_search(terms[0]))}')
+        print(f'regex (rare):         {await timed(lambda: regex_search(rare)):7.1f} ms, examined {await examined(regex_search(rare))}')
+    finally:
+        await notes_collection.delete_many({'user_id': USER_ID})
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--notes', type=int, default=100000)
+    parser.add_argument('--searches', type=int, default=50)
+    parser.add_argument('--pages', type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.notes, args.searches, args.pages))
@@ -0,0 +1,476 @@
+"""In-process stand-ins for MongoDB, the chat model and the embedding model.
+
+`install()` must run before anything imports `app.core.database`; it
+registers an in-memory replacement module, then `use_fakes()` swaps
+the app's lazy components for the fakes:
+
+    from benchmarks import offline
+    offline.install()
+    from app.groq_app import app
+    offline.use_fakes()
+"""
+import copy
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import time
+import types
+from datetime import datetime, timezone
+from typing import Any, Iterator, List, Optional
+import bson
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_missing = object()
+
+
+def _get(document: dict, path: str):
+    value = document
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return _missing
+        value = value[part]
+    return value
+
+def _compare(value, operand, op) -> bool:
+    if value is _missing or value is None:
+        return False
+    try:
+        return op(value, operand)
+    except TypeError:
+        return False
+
+_operators = {
+    '$eq': lambda value, operand: value == operand,
+    '$ne': lambda value, operand: value != operand,
+    '$in': lambda value, operand: value in operand,
+    '$nin': lambda value, operand: value not in operand,
+    '$exists': lambda value, operand: (value is not _missing) == bool(operand),
+    '$lt': lambda value, operand: _compare(value, operand, lambda a, b: a < b),
+    '$lte': lambda value, operand: _compare(value, operand, lambda a, b: a <= b),
+    '$gt': lambda value, operand: _compare(value, operand, lambda a, b: a > b),
+    '$gte': lambda value, operand: _compare(value, operand, lambda a, b: a >= b),
+    '$regex': lambda value, operand: isinstance(value, str) and re.search(operand, value) is not None,
+}
+
+def matches(document: dict, query: dict) -> bool:
+    for key, condition in query.items():
+        if key == '$and':
+            if not all(matches(document, part) for part in condition):
+                return False
+        elif key == '$or':
+            if not any(matches(document, part) for part in condition):
+                return False
+        else:
+            value = _get(document, key)
+            if isinstance(condition, dict) and condition and all(op.startswith('$') for op in condition):
+                for op, operand in condition.items():
+                    if op == '$options':
+                        continue
+                    if op not in _operators:
+                        raise NotImplementedError(f'query operator {op}')
+                    if not _operators[op](value, operand):
+                        return False
+            elif value is _missing or value != condition:
+                return False
+    return True
+
+def project(document: dict, projection: Optional[dict]) -> dict:
+    if not projection:
+        return copy.deepcopy(document)
+    include = {key for key, value in projection.items() if value and key != '_id'}
+    if include:
+        result = {key: copy.deepcopy(document[key]) for key in include if key in document}
+        if projection.get('_id', 1) and '_id' in document:
+            result['_id'] = document['_id']
+        return result
+    return {key: copy.deepcopy(value) for key, value in document.items() if projection.get(key, 1)}
+
+def _sort_key(value):
+    if value is _missing or value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    if isinstance(value, ObjectId):
+        return (3, value.binary)
+    if isinstance(value, datetime):
+        return (4, (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp())
+    return (5, str(value))
+
+
+def _evaluate(document: dict, expression):
+    if isinstance(expression, str) and expression.startswith('$'):
+        value = _get(document, expression[1:])
+        return None if value is _missing else value
+    if isinstance(expression, dict) and expression.get('$bsonSize') == '$$ROOT':
+        return len(bson.encode(document))
+    return expression
+
+def _group(documents: List[dict], spec: dict) -> List[dict]:
+    groups: dict = {}
+    for document in documents:
+        key = _evaluate(document, spec['_id'])
+        group = groups.setdefault(key, {'_id': key, **{field: 0 for field in spec if field != '_id'}})
+        for field, accumulator in spec.items():
+            if field == '_id':
+                continue
+            (op, expression), = accumulator.items()
+            if op != '$sum':
+                raise NotImplementedError(f'accumulator {op}')
+            group[field] += _evaluate(document, expression) or 0
+    return list(groups.values())
+
+
+class _Result(types.SimpleNamespace):
+    acknowledged = True
+
+
+class InMemoryCursor():
+    def __init__(self, documents: List[dict], projection: Optional[dict]):
+        self._documents = documents
+        self._projection = projection
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key, direction=None):
+        keys = [(key, direction or 1)] if isinstance(key, str) else key
+        for field, order in reversed(keys):
+            self._documents.sort(key=lambda document: _sort_key(_get(document, field)), reverse=order < 0)
+        return self
+
+    def skip(self, count: int):
+        self._skip = count
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def _selected(self) -> List[dict]:
+        documents = self._documents[self._skip:]
+        if self._limit:
+            documents = documents[:self._limit]
+        return [project(document, self._projection) for document in documents]
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        documents = self._selected()
+        return documents[:length] if length else documents
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self._selected():
+            yield document
+
+
+class InMemoryCollection():
+    """The subset of `AsyncIOMotorCollection` the app uses, over a list of dicts."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._documents: dict = {}
+        self.indexes: dict = {}
+
+    def _find(self, query: dict) -> List[dict]:
+        query = query or {}
+        if isinstance(query.get('_id'), ObjectId):
+            document = self._documents.get(query['_id'])
+            return [document] if document is not None and matches(document, query) else []
+        return [document for document in self._documents.values() if matches(document, query)]
+
+    async def find_one(self, query: Optional[dict] = None, projection: Optional[dict] = None):
+        documents = self._find(query)
+        return project(documents[0], projection) if documents else None
+
+    def find(self, query: Optional[dict] = None, projection: Optional[dict] = None) -> InMemoryCursor:
+        return InMemoryCursor(self._find(query), projection)
+
+    async def count_documents(self, query: dict) -> int:
+        return len(self._find(query))
+
+    def _insert(self, document: dict) -> ObjectId:
+        document.setdefault('_id', ObjectId())
+        if document['_id'] in self._documents:
+            raise DuplicateKeyError(f'duplicate key {document["_id"]}')
+        self._documents[document['_id']] = copy.deepcopy(document)
+        return document['_id']
+
+    async def insert_one(self, document: dict):
+        return _Result(inserted_id=self._insert(document))
+
+    async def insert_many(self, documents: List[dict], ordered: bool = True):
+        return _Result(inserted_ids=[self._insert(document) for document in documents])
+
+    def _apply(self, document: dict, update):
+        if isinstance(update, list):
+            for stage in update:
+                for field, value in stage.get('$set', {}).items():
+                    if isinstance(value, dict) and value.get('$toDate') == '$_id':
+                        value = document['_id'].generation_time
+                    document[field] = value
+            return
+        for op, fields in update.items():
+            for field, value in fields.items():
+                if op == '$set':
+                    document[field] = copy.deepcopy(value)
+                elif op == '$unset':
+                    document.pop(field, None)
+                elif op == '$inc':
+                    document[field] = document.get(field, 0) + value
+                elif op == '$push':
+                    document.setdefault(field, []).append(copy.deepcopy(value))
+                else:
+                    raise NotImplementedError(f'update operator {op}')
+
+    async def update_one(self, query: dict, update, upsert: bool = False):
+        documents = self._find(query)[:1]
+        for document in documents:
+            self._apply(document, update)
+        if not documents and upsert:
+            document = {key: value for key, value in query.items() if not key.startswith('$')}
+            self._apply(document, update)
+            return _Result(matched_count=0, modified_count=0, upserted_id=self._insert(document))
+        return _Result(matched_count=len(documents), modified_count=len(documents), upserted_id=None)
+
+    async def update_many(self, query: dict, update):
+        documents = self._find(query)
+        for document in documents:
+            self._apply(document, update)
+        return _Result(matched_count=len(documents), modified_count=len(documents))
+
+    async def delete_one(self, query: dict):
+        documents = self._find(query)[:1]
+        for document in documents:
+            del self._documents[document['_id']]
+        return _Result(deleted_count=len(documents))
+
+    async def delete_many(self, query: dict):
+        documents = self._find(query)
+        for document in documents:
+            del self._documents[document['_id']]
+        return _Result(deleted_count=len(documents))
+
+    def aggregate(self, pipeline: List[dict]) -> InMemoryCursor:
+        """Supports $match, $limit and $group with $sum of a constant, a field or {'$bsonSize': '$$ROOT'}."""
+        documents = list(self._documents.values())
+        for stage in pipeline:
+            (op, spec), = stage.items()
+            if op == '$match':
+                documents = [document for document in documents if matches(document, spec)]
+            elif op == '$limit':
+                documents = documents[:spec]
+            elif op == '$group':
+                documents = _group(documents, spec)
+            else:
+                raise NotImplementedError(f'aggregation stage {op}')
+        return InMemoryCursor(documents, None)
+
+    async def create_index(self, keys, name: Optional[str] = None, **kwargs):
+        name = name or '_'.join(f'{field}_{order}' for field, order in keys)
+        self.indexes[name] = {'keys': keys, **kwargs}
+        return name
+
+
+class InMemoryDatabase():
+    def __init__(self, name: str):
+        self.name = name
+        self._collections: dict = {}
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = InMemoryCollection(name)
+        return self._collections[name]
+
+    async def command(self, name: str, *args, **kwargs):
+        if name == 'serverStatus':
+            return {'connections': {'current': 0}}
+        raise NotImplementedError(f'command {name}')
+
+
+class InMemoryClient():
+    def __init__(self):
+        self._databases: dict = {}
+
+    def __getitem__(self, name: str) -> InMemoryDatabase:
+        if name not in self._databases:
+            self._databases[name] = InMemoryDatabase(name)
+        return self._databases[name]
+
+
+class FakeEmbeddings(Embeddings):
+    """Hashed bag-of-words vectors: deterministic, cheap, and similar for overlapping texts.
+
+    `delay` is slept once per call, standing in for a model forward pass.
+    """
+
+    def __init__(self, size: int = 256, delay: float = 0.0):
+        self.size = size
+        self.delay = delay
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.size
+        for token in re.findall(r'\w+', text.casefold()):
+            digest = hashlib.blake2b(token.encode('utf-8'), digest_size=4).digest()
+            vector[int.from_bytes(digest, 'little') % self.size] += 1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.delay)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.delay)
+        return self._embed(text)
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic streaming chat model.
+
+    Splits a user message on ';' into topics and looks each one up with
+    `notes_tool` when `tool_calls` is set: all topics in one call
+    (`tool_mode='batched'`), one call per topic in the same message
+    ('parallel') or one call per model turn ('serial'). Then it streams
+    `response_tokens` words, sleeping `first_token_delay` before the
+    first chunk and `token_delay` between chunks to mimic a hosted model.
+    """
+
+    response_tokens: int = 60
+    first_token_delay: float = 0.2
+    token_delay: float = 0.01
+    tool_calls: bool = True
+    tool_mode: str = 'batched'
+
+    @property
+    def _llm_type(self) -> str:
+        return 'fake-streaming'
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _pending_topics(self, messages: List[BaseMessage]) -> List[str]:
+        if not self.tool_calls:
+            return []
+        turn = next((i for i in range(len(messages) - 1, -1, -1) if isinstance(messages[i], HumanMessage)), None)
+        if turn is None:
+            return []
+        topics = [topic.strip()[:200] for topic in str(messages[turn].content).split(';') if topic.strip()]
+        searched = sum(
+            len(call['args'].get('queries', []))
+            for message in messages[turn + 1:] if isinstance(message, AIMessage)
+            for call in message.tool_calls
+        )
+        return topics[searched:]
+
+    def _tool_call(self, messages: List[BaseMessage], topics: List[str]) -> AIMessage:
+        if self.tool_mode == 'serial':
+            groups = [topics[:1]]
+        elif self.tool_mode == 'parallel':
+            groups = [[topic] for topic in topics]
+        else:
+            groups = [topics]
+        calls = []
+        for group in groups:
+            digest = hashlib.blake2b(f'{len(messages)}:{group}'.encode('utf-8'), digest_size=8).hexdigest()
+            calls.append({'name': 'notes_tool', 'args': {'queries': group}, 'id': f'call_{digest}'})
+        return AIMessage('', tool_calls=calls)
+
+    def _words(self, messages: List[BaseMessage]) -> List[str]:
+        seed = ' '.join(str(message.content) for message in messages if isinstance(message, (HumanMessage, ToolMessage)))
+        words = re.findall(r'\w+', seed) or ['ok']
+        return [words[i % len(words)] + ' ' for i in range(self.response_tokens)]
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if topics := self._pending_topics(messages):
+            time.sleep(self.first_token_delay)
+            message = self._tool_call(messages, topics)
+        else:
+            time.sleep(self.first_token_delay + self.token_delay * self.response_tokens)
+            message = AIMessage(''.join(self._words(messages)))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop=None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.first_token_delay)
+        if topics := self._pending_topics(messages):
+            for index, call in enumerate(self._tool_call(messages, topics).tool_calls):
+                chunk = ChatGenerationChunk(message=AIMessageChunk('', tool_call_chunks=[{
+                    'name': call['name'], 'args': json.dumps(call['args']), 'id': call['id'], 'index': index,
+                }]))
+                if run_manager:
+                    run_manager.on_llm_new_token('', chunk=chunk)
+                yield chunk
+            return
+
+        for i, word in enumerate(self._words(messages)):
+            if i:
+                time.sleep(self.token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(word))
+            if run_manager:
+                run_manager.on_llm_new_token(word, chunk=chunk)
+            yield chunk
+
+def install(database_name: str = 'notegenie_offline') -> InMemoryClient:
+    """Register an in-memory `app.core.database` and placeholder settings."""
+    for key, value in {
+        'DATABASE_NAME': database_name,
+        'DATABASE_URI': 'mongodb://offline',
+        'LLM_API_KEY': 'offline',
+        'JWT_SECRET': 'offline-benchmark-secret',
+    }.items():
+        os.environ.setdefault(key, value)
+
+    if 'app.core.database' in sys.modules:
+        raise RuntimeError('install() must run before app.core.database is imported')
+
+    client = InMemoryClient()
+    db = client[database_name]
+    module = types.ModuleType('app.core.database')
+    module.db_client = client
+    module.db = db
+    module.chats_collection = db['chats']
+    module.chats_cp_collection = db['chats_cp']
+    module.chats_cp_writes_collection = db['checkpoint_writes_aio']
+    module.notes_collection = db['notes']
+    module.users_collection = db['users']
+    module.locks_collection = db['locks']
+    sys.modules['app.core.database'] = module
+    return client
+
+def use_fakes(llm: Optional[BaseChatModel] = None, embeddings: Optional[Embeddings] = None):
+    """Point the app's components at the fakes, an ephemeral Chroma, an in-memory checkpointer
+    and a character-count tokenizer."""
+    import chromadb
+    from langgraph.checkpoint.memory import MemorySaver
+    from app import groq_app
+    from app.core.chat_saver import ChatSaver
+    from app.core.chunking import approximate_tokens
+    from app.core.vector_store import create_vectorstore
+
+    groq_app.embedding_model.override(embeddings or FakeEmbeddings())
+    groq_app.tokenizer.override(approximate_tokens)
+    client = chromadb.EphemeralClient()
+    groq_app.chroma_client.override(client)
+    groq_app.vectorstore.override(create_vectorstore(
+        client,
+        f'offline_{ObjectId()}',
+        groq_app.query_embeddings,
+    ))
+    groq_app.llm.override(llm or FakeChatModel())
+    ChatSaver.from_client = classmethod(lambda cls, client: MemorySaver())
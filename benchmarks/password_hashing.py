@@ -0,0 +1,75 @@
+"""Chat-stream latency during a burst of concurrent sign-ins.
+
+A fake stream yields a token every 10ms while 100 concurrent sign-in
+style requests verify a bcrypt hash, either inline on the event loop or
+through the bounded password hasher. No database is needed:
+
+    python -m benchmarks.password_hashing --sign-ins 100
+"""
+import argparse
+import asyncio
+import time
+import httpx
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from app.utils.auth import PasswordHasherBusy, averify_password, hash_password, verify_password
+
+TOKEN_INTERVAL = 0.01
+
+app = FastAPI()
+hashed = hash_password('correct horse battery staple')
+
+@app.get('/stream')
+async def stream(tokens: int = 200):
+    async def generate():
+        for _ in range(tokens):
+            await asyncio.sleep(TOKEN_INTERVAL)
+            yield 'token '
+    return StreamingResponse(generate(), media_type='text/plain')
+
+@app.post('/sign-in-inline')
+async def sign_in_inline():
+    verify_password('correct horse battery staple', hashed)
+    return {}
+
+@app.post('/sign-in-offloaded')
+async def sign_in_offloaded():
+    try:
+        await averify_password('correct horse battery staple', hashed)
+    except PasswordHasherBusy as e:
+        raise HTTPException(status_code=503) from e
+    return {}
+
+
+async def stream_gaps(client: httpx.AsyncClient):
+    gaps = []
+    async with client.stream('GET', '/stream') as response:
+        last = time.perf_counter()
+        async for _ in response.aiter_raw():
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+    return sorted(gaps)
+
+async def run(name: str, path: str, sign_ins: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+        streaming = asyncio.create_task(stream_gaps(client))
+        await asyncio.sleep(0.1)
+        responses = await asyncio.gather(*(client.post(path) for _ in range(sign_ins)))
+        gaps = await streaming
+
+    rejected = sum(response.status_code == 503 for response in responses)
+    p50 = gaps[len(gaps) // 2] * 1000
+    p99 = gaps[int(len(gaps) * 0.99) - 1] * 1000
+    print(f'{name:>9}: stream gap p50={p50:.1f}ms p99={p99:.1f}ms max={gaps[-1] * 1000:.1f}ms rejected={rejected}')
+
+async def main(sign_ins: int):
+    await run('inline', '/sign-in-inline', sign_ins)
+    await run('offloaded', '/sign-in-offloaded', sign_ins)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sign-ins', type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.sign_ins))
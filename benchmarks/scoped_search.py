@@ -0,0 +1,71 @@
+"""Query latency vs. corpus size: global search, user_id pre-filter, per-user shard.
+
+Uses random unit vectors in a throwaway Chroma directory, so no model is
+loaded. The 1M point takes a while to build:
+
+    python -m benchmarks.scoped_search --sizes 10000 100000 1000000
+"""
+import argparse
+import statistics
+import tempfile
+import time
+import chromadb
+import numpy as np
+
+
+def unit_vectors(rng, count: int, dim: int):
+    vectors = rng.standard_normal((count, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def fill(client, name: str, vectors, user_ids):
+    collection = client.create_collection(name)
+    batch_size = client.get_max_batch_size()
+    for start in range(0, len(vectors), batch_size):
+        end = start + batch_size
+        collection.add(
+            ids=[str(i) for i in range(start, min(end, len(vectors)))],
+            embeddings=vectors[start:end].tolist(),
+            metadatas=[{'user_id': user_id} for user_id in user_ids[start:end]],
+        )
+    return collection
+
+def latency(fn, queries) -> float:
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+def main(sizes, users: int, dim: int, k: int, query_count: int):
+    rng = np.random.default_rng(0)
+    queries = unit_vectors(rng, query_count, dim).tolist()
+    target = 'user-0'
+
+    print(f'{"chunks":>9} {"global":>10} {"filtered":>10} {"sharded":>10}')
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as path:
+            client = chromadb.PersistentClient(path=path)
+            vectors = unit_vectors(rng, size, dim)
+            user_ids = [f'user-{i % users}' for i in range(size)]
+            shared = fill(client, 'notes', vectors, user_ids)
+
+            own = [i for i, user_id in enumerate(user_ids) if user_id == target]
+            shard = fill(client, 'notes-user-0', vectors[own], [target] * len(own))
+
+            results = (
+                latency(lambda q: shared.query(query_embeddings=[q], n_results=k), queries),
+                latency(lambda q: shared.query(query_embeddings=[q], n_results=k, where={'user_id': target}), queries),
+                latency(lambda q: shard.query(query_embeddings=[q], n_results=k), queries),
+            )
+            print(f'{size:>9} ' + ' '.join(f'{ms:>8.2f}ms' for ms in results))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--queries', type=int, default=100)
+    args = parser.parse_args()
+    main(args.sizes, args.users, args.dim, args.k, args.queries)
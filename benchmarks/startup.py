@@ -0,0 +1,68 @@
+"""Import time of app.groq_app and time until a fresh server answers.
+
+Needs the usual `.env`. Measures, in fresh processes:
+  - `import app.groq_app`
+  - uvicorn boot until `GET /` answers
+  - uvicorn boot until `GET /ready` reports every component loaded
+
+    python -m benchmarks.startup --runs 3
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+
+def import_time() -> float:
+    code = 'import time; s = time.perf_counter(); import app.groq_app; print(time.perf_counter() - s)'
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+def wait_for(url: str, deadline: float) -> bool:
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.05)
+    return False
+
+def boot_times(port: int, timeout: float):
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.groq_app:app', '--port', str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = start + timeout
+        first = time.perf_counter() - start if wait_for(f'http://127.0.0.1:{port}/', deadline) else None
+        ready = time.perf_counter() - start if wait_for(f'http://127.0.0.1:{port}/ready', deadline) else None
+        return first, ready
+    finally:
+        server.terminate()
+        server.wait()
+
+def summary(values) -> str:
+    values = [v for v in values if v is not None]
+    return f'{statistics.median(values):.2f}s' if values else 'timeout'
+
+def main(runs: int, port: int, timeout: float):
+    imports = [import_time() for _ in range(runs)]
+    boots = [boot_times(port, timeout) for _ in range(runs)]
+    print(f'import app.groq_app: {summary(imports)}')
+    print(f'first request:       {summary(first for first, _ in boots)}')
+    print(f'fully warmed up:     {summary(ready for _, ready in boots)}')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--timeout', type=float, default=300)
+    args = parser.parse_args()
+    main(args.runs, args.port, args.timeout)
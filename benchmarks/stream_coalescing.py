@@ -0,0 +1,70 @@
+"""Writes, bytes and server CPU per streamed chat response, per token vs. coalesced.
+
+Drives StreamingResponse directly with a counting ASGI `send`, so every
+body message corresponds to one socket write in a real server. A fake
+source emits tokens at LLM-like pace:
+
+    python -m benchmarks.stream_coalescing --streams 1000 --tokens 300
+"""
+import argparse
+import asyncio
+import random
+import time
+from fastapi.responses import StreamingResponse
+from app.utils.streaming import StreamEvent, coalesce_tokens, to_sse, to_text
+
+
+async def fake_tokens(count: int, interval: float, seed: int):
+    rng = random.Random(seed)
+    for _ in range(count):
+        await asyncio.sleep(interval)
+        yield StreamEvent('token', rng.choice(('the', ' note', ' says', ',', ' meeting', ' at', ' 10', 'am', '.')))
+    yield StreamEvent('done', {})
+
+async def per_token(count: int, interval: float, seed: int):
+    async for event in fake_tokens(count, interval, seed):
+        if event.kind == 'token':
+            yield event.data
+
+async def serve(body) -> tuple:
+    writes = 0
+    size = 0
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal writes, size
+        if message['type'] == 'http.response.body' and message.get('body'):
+            writes += 1
+            size += len(message['body'])
+
+    await StreamingResponse(body)({'type': 'http', 'asgi': {'spec_version': '2.4'}}, receive, send)
+    return writes, size
+
+async def run(name: str, make_body, streams: int):
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    results = await asyncio.gather(*(serve(make_body(i)) for i in range(streams)))
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+
+    writes = sum(w for w, _ in results) / streams
+    size = sum(s for _, s in results) / streams
+    print(
+        f'{name:>10}: {writes:7.1f} writes/response {size:8.0f} bytes/response '
+        f'cpu={cpu:.2f}s per {streams} streams (wall {wall:.2f}s)'
+    )
+
+async def main(streams: int, tokens: int, interval: float):
+    await run('per-token', lambda i: per_token(tokens, interval, i), streams)
+    await run('coalesced', lambda i: to_text(coalesce_tokens(fake_tokens(tokens, interval, i))), streams)
+    await run('sse', lambda i: to_sse(coalesce_tokens(fake_tokens(tokens, interval, i))), streams)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--streams', type=int, default=1000)
+    parser.add_argument('--tokens', type=int, default=300)
+    parser.add_argument('--interval', type=float, default=0.005)
+    args = parser.parse_args()
+    asyncio.run(main(args.streams, args.tokens, args.interval))
@@ -0,0 +1,34 @@
+"""Per-call cost of telemetry.span with telemetry enabled and disabled.
+
+    python -m benchmarks.telemetry_overhead --calls 1000000
+"""
+import argparse
+import time
+from app.core import telemetry
+
+
+def run(calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        with telemetry.span('bench'):
+            pass
+    return time.perf_counter() - start
+
+def baseline(calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        pass
+    return time.perf_counter() - start
+
+def main(calls: int):
+    empty = baseline(calls)
+    for enabled in (False, True):
+        telemetry.configure(enabled)
+        elapsed = run(calls) - empty
+        print(f'{"enabled" if enabled else "disabled":>8}: {elapsed / calls * 1e9:.0f} ns/span')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=1000000)
+    args = parser.parse_args()
+    main(args.calls)
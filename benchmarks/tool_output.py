@@ -0,0 +1,87 @@
+"""Prompt tokens the notes tool adds per turn, before and after bounding.
+
+Indexes the synthetic notes from `benchmarks.chunking` (each note stored
+twice with a one-word edit, as re-imports and copies leave them) in an
+ephemeral Chroma with hashed embeddings. Each fact is then asked through
+`NotesTool._arun` and compared against the previous output, which joined
+the top-k chunks of every query unscored and capped only at 8000
+characters. Reports mean and p95 tool tokens per turn and how often the
+answer made it into the output:
+
+    python -m benchmarks.tool_output --notes 100 --budgets 500 1000 2000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import chromadb
+from langchain_chroma import Chroma
+from app.core.chunking import MarkdownChunker, approximate_tokens
+from app.core.components import LazyComponent
+from app.core.vector_store import create_vectorstore
+from app.tools.notes import NotesTool
+from benchmarks.chunking import make_corpus
+from benchmarks.offline import FakeEmbeddings
+
+USER_ID = 'bench-user'
+
+
+def make_store(notes, chunker: MarkdownChunker) -> Chroma:
+    store = create_vectorstore(chromadb.EphemeralClient(), 'bench', FakeEmbeddings())
+    for i, note in enumerate(notes):
+        for copy, content in enumerate((note['content'], note['content'].replace('agreed', 'decided', 1))):
+            chunks = chunker.split_text(f'# {note["title"]}\n\n{content}')
+            store.add_texts(
+                chunks,
+                metadatas=[{'note_id': f'{i}-{copy}', 'user_id': USER_ID, 'index': j} for j in range(len(chunks))],
+                ids=[f'{i}-{copy}:{j}' for j in range(len(chunks))],
+            )
+    return store
+
+async def previous_output(store: Chroma, query: str, k: int = 5, max_chars: int = 8000) -> str:
+    docs = await store.asimilarity_search(query, k=k, filter={'user_id': USER_ID})
+    kept, used = [], 0
+    for doc in docs:
+        if kept and used + len(doc.page_content) > max_chars:
+            break
+        kept.append(doc.page_content)
+        used += len(doc.page_content)
+    return json.dumps({'tool_status': 'active', 'search_results': '\n\n'.join(kept)})
+
+def measure(outputs, facts):
+    tokens = [approximate_tokens(output) for output in outputs]
+    found = sum(code in output for output, (code, _) in zip(outputs, facts))
+    return statistics.mean(tokens), sorted(tokens)[int(len(tokens) * 0.95) - 1], found / len(facts)
+
+async def main(args):
+    notes, facts = make_corpus(args.notes, args.sections)
+    store = make_store(notes, MarkdownChunker(max_tokens=args.chunk_tokens))
+    config = {'configurable': {'user_id': USER_ID}}
+
+    rows = [('previous', [await previous_output(store, query) for _, query in facts])]
+    for budget in args.budgets:
+        tool = NotesTool(
+            vectorstore=LazyComponent('vectorstore', lambda: store),
+            max_tokens=budget,
+            min_relevance=args.min_relevance,
+            mmr_lambda=args.mmr_lambda,
+        )
+        rows.append((f'bounded {budget}', [await tool._arun([query], config) for _, query in facts]))
+
+    baseline = None
+    print(f'{"output":<14} {"mean tok":>9} {"p95 tok":>8} {"answer in output":>17} {"saved":>7}')
+    for name, outputs in rows:
+        mean, p95, found = measure(outputs, facts)
+        baseline = baseline or mean
+        print(f'{name:<14} {mean:>9.0f} {p95:>8} {found:>17.1%} {1 - mean / baseline:>7.1%}')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--notes', type=int, default=100)
+    parser.add_argument('--sections', type=int, default=4)
+    parser.add_argument('--chunk-tokens', type=int, default=256)
+    parser.add_argument('--budgets', type=int, nargs='+', default=[500, 1000, 2000])
+    parser.add_argument('--min-relevance', type=float, default=0.2)
+    parser.add_argument('--mmr-lambda', type=float, default=0.7)
+    args = parser.parse_args()
+    asyncio.run(main(args))
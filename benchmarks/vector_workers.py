@@ -0,0 +1,132 @@
+"""Query throughput and memory from 1 to N worker processes.
+
+Compares every worker opening the embedded store (its own copy of the
+HNSW index) with every worker querying one local Chroma server. Seeds a
+temporary directory with random unit vectors and starts the server
+with the `chroma` CLI:
+
+    python -m benchmarks.vector_workers --chunks 50000 --workers 1 2 4 8
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+import numpy as np
+import chromadb
+from chromadb.config import Settings as ChromaSettings
+
+COLLECTION = 'bench'
+
+
+def client(mode: str, path: str, port: int):
+    settings = ChromaSettings(anonymized_telemetry=False)
+    if mode == 'server':
+        return chromadb.HttpClient(host='localhost', port=port, settings=settings)
+    return chromadb.PersistentClient(path=path, settings=settings)
+
+def seed(path: str, chunks: int, dimension: int, users: int):
+    rng = np.random.default_rng(0)
+    collection = client('embedded', path, 0).get_or_create_collection(COLLECTION, metadata={'hnsw:space': 'cosine'})
+    for start in range(0, chunks, 5000):
+        count = min(5000, chunks - start)
+        vectors = rng.standard_normal((count, dimension)).astype(np.float32)
+        collection.add(
+            ids=[f'{i}:0' for i in range(start, start + count)],
+            embeddings=(vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).tolist(),
+            metadatas=[{'user_id': f'user-{i % users}', 'note_id': str(i), 'index': 0} for i in range(start, start + count)],
+        )
+
+def worker(mode: str, path: str, port: int, dimension: int, users: int, duration: float, results):
+    rng = np.random.default_rng(os.getpid())
+    collection = client(mode, path, port).get_collection(COLLECTION)
+    collection.query(query_embeddings=[[0.0] * dimension], n_results=1)
+    queries = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        vector = rng.standard_normal(dimension).astype(np.float32)
+        collection.query(
+            query_embeddings=[(vector / np.linalg.norm(vector)).tolist()],
+            n_results=5,
+            where={'user_id': f'user-{rng.integers(users)}'},
+        )
+        queries += 1
+    results.put((queries, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+def start_server(path: str, port: int, timeout: float = 60) -> subprocess.Popen:
+    server = subprocess.Popen(
+        ['chroma', 'run', '--path', path, '--port', str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            client('server', path, port).heartbeat()
+            return server
+        except Exception:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError('chroma server did not start')
+
+def server_rss(server: subprocess.Popen) -> float:
+    try:
+        with open(f'/proc/{server.pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+def run(mode: str, path: str, port: int, workers: int, args) -> tuple:
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(mode, path, port, args.dimension, args.users, args.duration, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return sum(queries for queries, _ in outcomes) / args.duration, sum(rss for _, rss in outcomes)
+
+def main(args):
+    path = tempfile.mkdtemp(prefix='bench-chroma-')
+    try:
+        seed(path, args.chunks, args.dimension, args.users)
+        print(f'{"workers":>7} {"embedded q/s":>13} {"RSS MB":>8} {"server q/s":>11} {"RSS MB":>8}')
+        port = free_port()
+        for workers in args.workers:
+            embedded = run('embedded', path, port, workers, args)
+            server = start_server(path, port)
+            try:
+                shared = run('server', path, port, workers, args)
+                shared = (shared[0], shared[1] + server_rss(server))
+            finally:
+                server.terminate()
+                server.wait()
+            print(f'{workers:>7} {embedded[0]:>13.0f} {embedded[1]:>8.0f} {shared[0]:>11.0f} {shared[1]:>8.0f}')
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--chunks', type=int, default=50000)
+    parser.add_argument('--dimension', type=int, default=768)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+    main(args)